@@ -0,0 +1,59 @@
+"""Сравнение Builtin.cat и Builtin.wc с GNU cat/wc на большом файле
+
+    PYTHONPATH=. python -m benchmarks.bench_builtins --size 1G
+
+Пиковая память выводится только для встроенных команд, это память процесса бенчмарка.
+Для GNU-утилит её честно не измерить: ru_maxrss процесса, запущенного из Python,
+даже через os.wait4 включает пик памяти интерпретатора, унаследованный через exec.
+"""
+import argparse
+import io
+import os
+import subprocess
+import tempfile
+
+import benchmarks.common as common
+import src.builtins as builtins
+
+
+LINE = b"roses are red violets are blue \xd0\xbf\xd1\x80\xd0\xb8\xd0\xb2\xd0\xb5\xd1\x82 42\n"
+
+
+def make_file(path: str, size: int) -> None:
+    block = LINE * (builtins.FILE_CHUNK_SIZE // len(LINE))
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            written += f.write(block[:size - written])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="1G", help="размер входного файла, например 256M или 1G")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    size = common.parse_size(args.size)
+    env = {**os.environ, "LC_ALL": "C"}
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        path = os.path.join(tmp, "input.txt")
+        make_file(path, size)
+
+        cases = {
+            "Builtin.cat": (lambda: builtins.Builtin.cat(None, devnull, path), True),
+            "GNU cat": (lambda: subprocess.run(["cat", path], stdout=subprocess.DEVNULL, env=env, check=True), False),
+            "Builtin.wc": (lambda: builtins.Builtin.wc(None, io.StringIO(), path), True),
+            "GNU wc": (lambda: subprocess.run(["wc", path], stdout=subprocess.DEVNULL, env=env, check=True), False),
+        }
+        rows = []
+        for name, (fn, builtin) in cases.items():
+            seconds = common.measure(fn, args.repeat)
+            rss = f"{common.peak_rss_mib():.0f}" if builtin else "-"
+            rows.append([name, f"{seconds:.3f}", f"{size / seconds / 2 ** 20:.0f}", rss])
+
+    print(f"input: {size} bytes")
+    common.print_table(["case", "best, s", "MiB/s", "peak RSS, MiB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Подстановка переменных при большом числе определённых переменных
+
+Сравнивает Context.populate_values с прежним подходом: str.replace для
+каждой определённой переменной.
+
+    PYTHONPATH=. python -m benchmarks.bench_context --variables 1000
+"""
+import argparse
+
+import benchmarks.common as common
+import src.context as context_lib
+
+
+TEMPLATES = [
+    "cat ${FILE_1} ${FILE_2}",
+    "--out=${OUT_DIR}/result.txt",
+    "plain argument without references",
+    "$HOME/${USER}/logs",
+]
+
+
+def replace_each(params: dict[str, str], template: str) -> str:
+    for k, v in params.items():
+        template = template.replace(f"${{{k}}}", v)
+    return template
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--variables", type=int, default=1000)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    context = context_lib.Context()
+    for i in range(args.variables):
+        context.add_unscoped_param(f"VAR_{i}", f"value_{i}")
+    for name in ("FILE_1", "FILE_2", "OUT_DIR", "HOME", "USER"):
+        context.add_unscoped_param(name, name.lower())
+
+    def populate_values() -> None:
+        for _ in range(args.lines):
+            for template in TEMPLATES:
+                context.populate_values(template)
+
+    def baseline() -> None:
+        for _ in range(args.lines):
+            for template in TEMPLATES:
+                replace_each(dict(context.get_env()), template)
+
+    rows = []
+    for name, fn in (("str.replace per variable", baseline), ("Context.populate_values", populate_values)):
+        seconds = common.measure(fn, args.repeat)
+        per_token = seconds / (args.lines * len(TEMPLATES))
+        rows.append([name, f"{seconds * 1000:.1f}", f"{per_token * 1e6:.2f}"])
+
+    print(f"variables: {args.variables + 5}, tokens: {args.lines * len(TEMPLATES)}")
+    common.print_table(["case", "best, ms", "us/token"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Вставленная пачка строк через stdin: последовательный режим против --async-input
+
+В асинхронном режиме следующие строки читаются и разбираются, пока текущий
+конвейер ждёт внешнюю программу. Строки различаются, чтобы разбор не брался из кеша.
+
+    PYTHONPATH=. python -m benchmarks.bench_frontend --lines 2000 --words 200
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+import benchmarks.common as common
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=200, help="слов в каждой строке")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "batch.sh")
+        with open(path, "w") as batch:
+            for i in range(args.lines):
+                words = " ".join(f'"w{i}_{j}"' for j in range(args.words))
+                batch.write(f"echo {words} | tr a-z A-Z\n")
+
+        rows = []
+        for mode, run_args in (("sequential", []), ("async input", ["--async-input"])):
+
+            def run() -> None:
+                # Пачка приходит через pipe, как вставленный в терминал текст
+                with open(path, "rb") as source:
+                    subprocess.run(
+                        [sys.executable, "src/main.py", *run_args],
+                        input=source.read(),
+                        stdout=subprocess.DEVNULL,
+                        check=True,
+                        env={**os.environ, "PYTHONPATH": "."},
+                    )
+
+            seconds = common.measure(run, args.repeat)
+            rows.append([mode, args.lines, f"{seconds:.2f}", f"{args.lines / seconds:.0f}"])
+
+    common.print_table(["mode", "commands", "seconds", "commands/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
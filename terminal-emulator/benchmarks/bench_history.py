@@ -0,0 +1,65 @@
+"""История команд: открытие, задержка записи и поиск при миллионах команд
+
+    PYTHONPATH=. python -m benchmarks.bench_history --entries 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import benchmarks.common as common
+import src.history as history_lib
+
+
+COMMANDS = [
+    "cat logs/{i}.txt | grep error | wc",
+    "echo build {i}",
+    "x={i} echo $x",
+    "sort data{i}.csv | uniq -c | head -n 10",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history")
+        history = history_lib.History()
+        history.configure(path)
+        start = time.perf_counter()
+        for i in range(args.entries):
+            history.add(COMMANDS[i % len(COMMANDS)].format(i=i))
+        seconds = time.perf_counter() - start
+        history.close()
+        rows.append(["add, per command", f"{seconds / args.entries * 1e6:.2f} us"])
+        rows.append(["log size", f"{os.path.getsize(path) / 2 ** 20:.1f} MiB"])
+
+        def reopen() -> None:
+            reopened = history_lib.History()
+            reopened.configure(path)
+            len(reopened)
+            reopened.close()
+
+        rows.append(["open", f"{common.measure(reopen, args.repeat) * 1000:.3f} ms"])
+
+        history = history_lib.History()
+        history.configure(path)
+        last = f"build {args.entries - 1}"
+        for label, run in (
+            ("last 10", lambda: history.entries(len(history) - 10)),
+            ("prefix 'sort data9999'", lambda: history.search("sort data9999", prefix=True)),
+            (f"substring '{last}'", lambda: history.search(last)),
+            ("substring 'error', all matches", lambda: history.search("error")),
+        ):
+            rows.append([label, f"{common.measure(run, args.repeat) * 1000:.2f} ms"])
+        history.close()
+
+    common.print_table(["operation", "time"], rows)
+
+
+if __name__ == "__main__":
+    main()
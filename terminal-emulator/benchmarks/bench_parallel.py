@@ -0,0 +1,45 @@
+"""Подсчёт и вывод большого числа файлов: последовательно и параллельно
+
+    PYTHONPATH=. python -m benchmarks.bench_parallel --files 1000 --size 10M
+"""
+import argparse
+import io
+import os
+import tempfile
+
+import benchmarks.bench_builtins as bench_builtins
+import benchmarks.common as common
+import src.builtins as builtins
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--size", default="10M", help="размер каждого файла")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    size = common.parse_size(args.size)
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        paths = [os.path.join(tmp, f"{i}.log") for i in range(args.files)]
+        for path in paths:
+            bench_builtins.make_file(path, size)
+
+        total = size * args.files
+        cases = {
+            "wc -j 1": lambda: builtins.Builtin.wc(None, io.StringIO(), *paths, j="1"),
+            "wc (auto)": lambda: builtins.Builtin.wc(None, io.StringIO(), *paths),
+            f"wc -j {os.cpu_count()} (all cores)": lambda: builtins.Builtin.wc(None, io.StringIO(), *paths, j=str(os.cpu_count())),
+            "cat": lambda: builtins.Builtin.cat(None, devnull, *paths),
+        }
+        rows = []
+        for name, fn in cases.items():
+            seconds = common.measure(fn, args.repeat)
+            rows.append([name, f"{seconds:.2f}", f"{total / seconds / 2 ** 20:.0f}"])
+
+    print(f"files: {args.files} x {size} bytes")
+    common.print_table(["case", "best, s", "MiB/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Ускорение от кеша разбора на повторяющихся командах
+
+Запуск конвейеров заменён заглушкой, измеряется только разбор и подстановка.
+
+    PYTHONPATH=. python -m benchmarks.bench_parse_cache
+"""
+import argparse
+
+import benchmarks.common as common
+import src.context as context_lib
+import src.io as io_lib
+import src.models as models
+
+
+COMMANDS = [
+    "cat ${LOG_DIR}/app.log | grep --regexp ERROR | wc",
+    "echo 'processing' ${ITEM} --verbose",
+    "ITEM=item-42 echo \"${ITEM} done\" | wc",
+    "wc -l ${LOG_DIR}/app.log ${LOG_DIR}/db.log",
+]
+
+
+class NullExecutor:
+    def execute_pipeline(self, env, commands, stdin=None, measure=False, stdout=None, stderr=None):
+        status = models.Status()
+        status.index, status.code = len(commands) - 1, 0
+        return status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = []
+    for cache_size in (0, io_lib.DEFAULT_PARSE_CACHE_SIZE):
+        context = context_lib.Context()
+        context.add_unscoped_param("LOG_DIR", "/var/log")
+        io = io_lib.IO(context, NullExecutor(), parse_cache_size=cache_size)  # type: ignore[arg-type]
+
+        def run() -> None:
+            for i in range(args.lines):
+                io.execute_command(COMMANDS[i % len(COMMANDS)])
+
+        seconds = common.measure(run, args.repeat)
+        info = io.parse_cache_info()
+        rows.append([cache_size, f"{seconds:.3f}", f"{args.lines / seconds:.0f}", info.hits, info.misses])
+
+    common.print_table(["cache size", "best, s", "lines/s", "hits", "misses"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Масштабирование разбора команды: время на токен должно оставаться постоянным
+
+    PYTHONPATH=. python -m benchmarks.bench_parser
+"""
+import argparse
+
+import benchmarks.common as common
+import src.io as io_lib
+
+
+def make_line(args_count: int) -> str:
+    words = ("x", "'quoted arg'", "-n", "10", "--out=", "file", "name=value")
+    return "echo " + " ".join(words[i % len(words)] for i in range(args_count)) + " | wc"
+
+
+def parse(io: io_lib.IO, line: str) -> None:
+    env, tokens = io.consume_defenitions(io.tokenize(line))
+    position = 0
+    while position < len(tokens):
+        _, position = io.consume_command_at(tokens, position)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,50000,100000,200000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    io = io_lib.IO(None, None)  # type: ignore[arg-type]
+    rows = []
+    for size in map(int, args.sizes.split(",")):
+        line = make_line(size)
+        seconds = common.measure(lambda: parse(io, line), args.repeat)
+        rows.append([size, len(line), f"{seconds * 1000:.2f}", f"{seconds / size * 1e6:.3f}"])
+    common.print_table(["args", "chars", "best, ms", "us/arg"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""wc по большому файлу без кеша результатов, с попаданием в кеш и после дописывания в конец файла
+
+    PYTHONPATH=. python -m benchmarks.bench_result_cache --size 1G --append 1M
+"""
+import argparse
+import io
+import os
+import tempfile
+
+import benchmarks.bench_builtins as bench_builtins
+import benchmarks.common as common
+import src.builtins as builtins
+import src.result_cache as result_cache_lib
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="1G", help="размер входного файла")
+    parser.add_argument("--append", default="1M", help="сколько байт дописывается перед каждым запуском")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tail = bench_builtins.LINE * (common.parse_size(args.append) // len(bench_builtins.LINE))
+    cache = result_cache_lib.result_cache
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "input.txt")
+        bench_builtins.make_file(path, common.parse_size(args.size))
+
+        def run() -> None:
+            builtins.Builtin.wc(None, io.StringIO(), path)
+
+        def append_and_run() -> None:
+            with open(path, "ab") as f:
+                f.write(tail)
+            run()
+
+        rows.append(["no cache", f"{common.measure(run, args.repeat) * 1000:.2f}"])
+        cache.configure()
+        run()
+        rows.append(["hit", f"{common.measure(run, args.repeat) * 1000:.2f}"])
+        rows.append([f"append {args.append}", f"{common.measure(append_and_run, args.repeat) * 1000:.2f}"])
+        rows.append(["stats", " ".join(f"{kind}={count}" for kind, count in cache.stats.items())])
+
+    common.print_table(["wc", "time, ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Слоистый Context: большие окружения и глубокая вложенность областей видимости
+
+Сравнивает снимок окружения после изменения переменной с копированием
+объединённого словаря, как это делалось раньше.
+
+    PYTHONPATH=. python -m benchmarks.bench_scopes --variables 10000 --depth 100
+"""
+import argparse
+
+import benchmarks.common as common
+import src.context as context_lib
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--variables", type=int, default=10000)
+    parser.add_argument("--depth", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    context = context_lib.Context()
+    flat = {}
+    for i in range(args.variables):
+        context.add_unscoped_param(f"VAR_{i}", f"value_{i}")
+        flat[f"VAR_{i}"] = f"value_{i}"
+
+    def merge_copy() -> None:
+        for i in range(args.iterations):
+            scoped = {"ITEM": str(i)}
+            {**flat, **scoped}.get("ITEM")
+
+    def scoped_snapshot() -> None:
+        for i in range(args.iterations):
+            context.add_scoped_param("ITEM", str(i))
+            context.get_env().get("ITEM")
+            context.exit_scope()
+
+    def push_pop() -> None:
+        for _ in range(args.iterations // 10):
+            for depth in range(args.depth):
+                context.push_scope()
+                context.add_scoped_param("LEVEL", str(depth))
+            for _ in range(args.depth):
+                context.pop_scope()
+
+    def deep_lookup() -> None:
+        for depth in range(args.depth):
+            context.push_scope()
+            context.add_scoped_param(f"LEVEL_{depth}", str(depth))
+        for _ in range(args.iterations):
+            context.populate_values("${VAR_0} ${LEVEL_0} $VAR_9 ${MISSING}")
+        for _ in range(args.depth):
+            context.pop_scope()
+
+    def child_sessions() -> None:
+        for i in range(args.iterations):
+            session = context.child()
+            session.add_unscoped_param("SESSION", str(i))
+            session.get_env()
+
+    cases = {
+        "copy merged dict (old get_env)": (merge_copy, args.iterations),
+        "scoped param + get_env": (scoped_snapshot, args.iterations),
+        f"push/pop {args.depth} scopes": (push_pop, args.iterations // 10 * args.depth),
+        f"populate_values at depth {args.depth}": (deep_lookup, args.iterations),
+        "child context + get_env": (child_sessions, args.iterations),
+    }
+    rows = []
+    for name, (fn, operations) in cases.items():
+        seconds = common.measure(fn, args.repeat)
+        rows.append([name, f"{seconds * 1000:.2f}", f"{seconds / operations * 1e6:.2f}"])
+
+    print(f"variables: {args.variables}, depth: {args.depth}")
+    common.print_table(["case", "best, ms", "us/op"], rows)
+
+
+if __name__ == "__main__":
+    main()
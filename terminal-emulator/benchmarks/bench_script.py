@@ -0,0 +1,55 @@
+"""Пропускная способность скриптового режима main.py
+
+Генерирует скрипт из встроенных команд и считает команды в секунду.
+
+    PYTHONPATH=. python -m benchmarks.bench_script --lines 100000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import benchmarks.common as common
+
+
+COMMANDS = [
+    "echo hello world",
+    "name=value",
+    "echo ${name} | wc",
+    "pwd",
+    "wc tests/example.txt",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "script.sh")
+        with open(path, "w") as script:
+            for i in range(args.lines):
+                script.write(COMMANDS[i % len(COMMANDS)] + "\n")
+
+        rows = []
+        for mode, run_args, stdin_path in (("file argument", [path], os.devnull), ("stdin pipe", [], path)):
+            with open(stdin_path) as stdin:
+                start = time.perf_counter()
+                subprocess.run(
+                    [sys.executable, "src/main.py", *run_args],
+                    stdin=stdin,
+                    stdout=subprocess.DEVNULL,
+                    check=True,
+                    env={**os.environ, "PYTHONPATH": "."},
+                )
+                seconds = time.perf_counter() - start
+            rows.append([mode, args.lines, f"{seconds:.2f}", f"{args.lines / seconds:.0f}"])
+
+    common.print_table(["mode", "commands", "seconds", "commands/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
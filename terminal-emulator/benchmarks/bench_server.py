@@ -0,0 +1,91 @@
+"""Нагрузочный тест режима сервера: запросы в секунду и задержки при многих одновременных сессиях
+
+Запускает python src/main.py --server во временном каталоге и открывает --sessions
+клиентов, каждый из которых выполняет --requests строк.
+
+    PYTHONPATH=. python -m benchmarks.bench_server --sessions 32 --requests 500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import benchmarks.common as common
+import src.server as server_lib
+
+
+COMMANDS = [
+    "echo hello world",
+    "name=value",
+    "echo ${name} | wc",
+    "pwd",
+    "wc tests/example.txt",
+    "cat tests/example.txt | grep red | wc",
+]
+
+
+def wait_for_socket(path: str, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"server did not create {path}")
+        time.sleep(0.01)
+
+
+def run_session(path: str, requests: int, latencies: list[float]) -> None:
+    with server_lib.Client(path) as client:
+        for i in range(requests):
+            start = time.perf_counter()
+            client.execute(COMMANDS[i % len(COMMANDS)])
+            latencies.append(time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", default="1,8,32", help="числа одновременных сессий через запятую")
+    parser.add_argument("--requests", type=int, default=500, help="строк на одну сессию")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "shell.sock")
+        server = subprocess.Popen(
+            [sys.executable, "src/main.py", "--server", path], env={**os.environ, "PYTHONPATH": "."}
+        )
+        try:
+            wait_for_socket(path)
+            for sessions in map(int, args.sessions.split(",")):
+                latencies: list[list[float]] = [[] for _ in range(sessions)]
+                threads = [
+                    threading.Thread(target=run_session, args=(path, args.requests, latencies[i]))
+                    for i in range(sessions)
+                ]
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                seconds = time.perf_counter() - start
+
+                all_latencies = sorted(latency for session in latencies for latency in session)
+                p99 = all_latencies[min(len(all_latencies) - 1, int(len(all_latencies) * 0.99))]
+                rows.append([
+                    sessions,
+                    len(all_latencies),
+                    f"{len(all_latencies) / seconds:.0f}",
+                    f"{statistics.median(all_latencies) * 1000:.2f}",
+                    f"{p99 * 1000:.2f}",
+                ])
+        finally:
+            server.terminate()
+            server.wait()
+
+    common.print_table(["sessions", "requests", "requests/s", "p50, ms", "p99, ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
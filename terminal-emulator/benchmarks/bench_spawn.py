@@ -0,0 +1,49 @@
+"""Стоимость запуска коротких внешних команд для разных способов запуска
+
+--ballast раздувает память интерпретатора, чтобы показать зависимость
+стоимости fork от размера процесса.
+
+    PYTHONPATH=. python -m benchmarks.bench_spawn --count 10000 --ballast 1024
+"""
+import argparse
+import contextlib
+import os
+import sys
+
+import benchmarks.common as common
+import src.executor as executor_lib
+import src.models as models
+import src.spawn as spawn
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--ballast", type=int, default=0, help="дополнительная память процесса, MiB")
+    args = parser.parse_args()
+
+    ballast = bytearray(os.urandom(1024)) * (args.ballast * 1024)  # noqa: F841
+    env = {"PATH": os.environ.get("PATH", os.defpath)}
+    pipelines = {
+        "true": [models.make_command("true")],
+        "echo": [models.make_command("/bin/echo", "hello")],
+    }
+
+    rows = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for backend, spawner in spawn.SPAWNERS.items():
+            executor = executor_lib.Executor(spawner())
+            for name, pipeline in pipelines.items():
+                def run() -> None:
+                    for _ in range(args.count):
+                        executor.execute_pipeline(env, pipeline)
+
+                seconds = common.measure(run, repeat=1)
+                rows.append([backend, name, args.count, f"{seconds:.2f}", f"{seconds / args.count * 1e6:.0f}"])
+
+    print(f"peak RSS: {common.peak_rss_mib():.0f} MiB", file=sys.stderr)
+    common.print_table(["backend", "command", "runs", "seconds", "us/run"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Время запуска оболочки: импорт модулей по -X importtime и время до первой команды
+
+С --budget-ms код выхода равен 1, если импорт src.main дольше бюджета или
+при старте загружен один из тяжёлых модулей, которые должны импортироваться лениво.
+
+    PYTHONPATH=. python -m benchmarks.bench_startup --budget-ms 60
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import benchmarks.common as common
+
+
+# Нужны только внешним программам, wc -j и журналу --trace
+LAZY_MODULES = ("subprocess", "multiprocessing", "concurrent.futures", "json", "shutil")
+ENV = {**os.environ, "PYTHONPATH": "."}
+
+
+def import_times() -> dict[str, int]:
+    """Суммарное время импорта каждого модуля при импорте src.main, в микросекундах"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        capture_output=True, text=True, env=ENV, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def first_command_seconds() -> float:
+    """Время от запуска интерпретатора до выполнения первой команды скрипта"""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "src/main.py"], input=b"echo ready\n", stdout=subprocess.DEVNULL, env=ENV, check=True
+    )
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, help="допустимое время импорта src.main, мс")
+    args = parser.parse_args()
+
+    imports = [import_times() for _ in range(args.runs)]
+    import_ms = statistics.median(times["src.main"] for times in imports) / 1000
+    loaded = [name for name in LAZY_MODULES if name in imports[0]]
+    first_command_ms = min(first_command_seconds() for _ in range(args.runs)) * 1000
+
+    slowest = sorted(imports[0].items(), key=lambda item: item[1], reverse=True)[1:11]
+    common.print_table(["module", "cumulative, ms"], [[name, f"{us / 1000:.2f}"] for name, us in slowest])
+    print()
+    common.print_table(
+        ["metric", "value"],
+        [
+            ["import src.main (median), ms", f"{import_ms:.1f}"],
+            ["first command (best), ms", f"{first_command_ms:.1f}"],
+            ["eagerly loaded lazy modules", ", ".join(loaded) or "-"],
+        ],
+    )
+
+    if args.budget_ms is None:
+        return 0
+    if loaded or import_ms > args.budget_ms:
+        print(f"startup budget of {args.budget_ms} ms exceeded", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
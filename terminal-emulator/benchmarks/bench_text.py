@@ -0,0 +1,77 @@
+"""Встроенные grep/head/tail/sort/uniq против внешних программ в конвейере cat FILE | ...
+
+На маленьком входе время определяется запуском стадии, на большом - обработкой данных.
+Внешние программы вызываются по полному пути, поэтому реестр встроенных команд их не перехватывает.
+
+    PYTHONPATH=. python -m benchmarks.bench_text --small 4K --large 64M
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import tempfile
+
+import benchmarks.bench_builtins as bench_builtins
+import benchmarks.common as common
+import src.executor as executor_lib
+import src.models as models
+
+
+STAGES = [
+    ("grep", ["red"]),
+    ("grep", ["-v", "-i", "ROSES"]),
+    ("head", ["-n", "10"]),
+    ("tail", ["-n", "10"]),
+    ("sort", []),
+    ("uniq", []),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--small", default="4K", help="размер маленького входа")
+    parser.add_argument("--large", default="64M", help="размер большого входа")
+    parser.add_argument("--runs", type=int, default=200, help="число запусков на маленьком входе")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    executor = executor_lib.Executor()
+    env = {"PATH": os.environ.get("PATH", os.defpath), "LC_ALL": "C"}
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        inputs = {}
+        for label, size in (("small", args.small), ("large", args.large)):
+            inputs[label] = os.path.join(tmp, f"{label}.txt")
+            bench_builtins.make_file(inputs[label], common.parse_size(size))
+
+        with contextlib.redirect_stdout(devnull):
+            for name, stage_args in STAGES:
+                external = shutil.which(name)
+                for label, path in inputs.items():
+                    runs = args.runs if label == "small" else 1
+                    times = []
+                    for program in (name, external):
+                        if program is None:
+                            times.append(float("nan"))
+                            continue
+                        pipeline = [models.make_command("cat", path), models.make_command(program, *stage_args)]
+
+                        def run() -> None:
+                            for _ in range(runs):
+                                executor.execute_pipeline(env, pipeline)
+
+                        times.append(common.measure(run, args.repeat) / runs)
+                    builtin_s, external_s = times
+                    rows.append([
+                        " ".join([name, *stage_args]),
+                        label,
+                        f"{builtin_s * 1000:.2f}",
+                        f"{external_s * 1000:.2f}",
+                        f"{external_s / builtin_s:.2f}x",
+                    ])
+
+    common.print_table(["command", "input", "builtin, ms", "external, ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Общие утилиты бенчмарков
+
+Бенчмарки запускаются из корня проекта, например:
+    PYTHONPATH=. python -m benchmarks.bench_builtins --size 1G
+"""
+import json
+import os
+import platform
+import resource
+import time
+import typing
+
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(value: str) -> int:
+    """Превращает строку вида 512M или 1G в число байт"""
+    if value[-1:].upper() in UNITS:
+        return int(float(value[:-1]) * UNITS[value[-1].upper()])
+    return int(value)
+
+
+def measure(fn: typing.Callable[[], object], repeat: int = 3) -> float:
+    """Возвращает лучшее время выполнения fn в секундах из repeat запусков"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_rss_mib() -> float:
+    """Пиковый размер резидентной памяти текущего процесса в MiB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def print_table(header: list[str], rows: list[list[object]]) -> None:
+    """Печатает результаты выровненной таблицей"""
+    cells = [header, *[[str(cell) for cell in row] for row in rows]]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(header))]
+    for row in cells:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def save_results(path: str, results: dict[str, float]) -> None:
+    """Сохраняет лучшие времена случаев в JSON вместе с описанием окружения"""
+    document = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_results(path: str) -> dict[str, float]:
+    """Загружает времена случаев, сохранённые save_results"""
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare_results(
+    baseline: dict[str, float],
+    current: dict[str, float],
+    threshold: float,
+) -> tuple[list[list[object]], list[str]]:
+    """Сравнивает времена с базовыми, возвращает строки таблицы и имена регрессий
+
+    Регрессией считается случай, ставший медленнее больше чем в 1 + threshold раз.
+    Случаи, которых нет в одном из наборов, в сравнение не попадают.
+    """
+    rows: list[list[object]] = []
+    regressions = []
+    for name, seconds in current.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name] if baseline[name] > 0 else float("inf")
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        verdict = "REGRESSION" if regressed else "faster" if ratio < 1 - threshold else "ok"
+        rows.append([name, f"{baseline[name] * 1000:.2f}", f"{seconds * 1000:.2f}", f"{ratio:.2f}x", verdict])
+    return rows, regressions
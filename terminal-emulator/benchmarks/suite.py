@@ -0,0 +1,131 @@
+"""Набор бенчмарков горячих путей: разбор, подстановка, встроенные команды и конвейеры
+
+Каждый компонент вызывается через свой API, терминал не нужен. Нагрузки
+детерминированы, поэтому результаты разных запусков сравнимы между собой.
+
+    PYTHONPATH=. python -m benchmarks.suite --output baseline.json
+    PYTHONPATH=. python -m benchmarks.suite --compare baseline.json --threshold 0.1
+
+С --compare код выхода равен 1, если хотя бы один случай стал медленнее порога.
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import typing
+
+import benchmarks.bench_builtins as bench_builtins
+import benchmarks.bench_context as bench_context
+import benchmarks.bench_parser as bench_parser
+import benchmarks.common as common
+import src.builtins as builtins
+import src.context as context_lib
+import src.executor as executor_lib
+import src.io as io_lib
+import src.models as models
+
+
+SHORT_LINES = [
+    "echo hello world",
+    "cat 'some file.txt' | wc",
+    "FILE=input.txt cat ${FILE} | grep --regexp ERROR | wc > out.txt",
+    "wc -j 4 a.log b.log c.log &",
+]
+PIPELINE_STAGES = (1, 2, 5, 10)
+
+
+def make_pipeline(stages: int, path: str, external_cat: str) -> list[models.Command]:
+    """Конвейер из stages стадий: встроенный cat файла, затем внешний и встроенный cat по очереди, в конце wc"""
+    if stages == 1:
+        return [models.make_command("wc", path)]
+    commands = [models.make_command("cat", path)]
+    for index in range(1, stages - 1):
+        commands.append(models.make_command(external_cat) if index % 2 else models.make_command("cat"))
+    commands.append(models.make_command("wc"))
+    return commands
+
+
+def make_cases(
+    tmp: str,
+    scale: float,
+    file_size: int,
+    devnull: typing.IO[str],
+) -> dict[str, typing.Callable[[], object]]:
+    """Создаёт входные данные и возвращает случаи бенчмарка по именам"""
+    count = max(1, int(1000 * scale))
+    shell_io = io_lib.IO(None, None)  # type: ignore[arg-type]
+    long_line = bench_parser.make_line(max(1, int(10000 * scale)))
+
+    context = context_lib.Context()
+    for i in range(1000):
+        context.add_unscoped_param(f"VAR_{i}", f"value_{i}")
+    for name in ("FILE_1", "FILE_2", "OUT_DIR", "HOME", "USER"):
+        context.add_unscoped_param(name, name.lower())
+
+    big_file = os.path.join(tmp, "big.txt")
+    bench_builtins.make_file(big_file, file_size)
+    pipeline_file = os.path.join(tmp, "pipeline.txt")
+    bench_builtins.make_file(pipeline_file, min(file_size, 1024 * 1024))
+
+    cases: dict[str, typing.Callable[[], object]] = {
+        "tokenize.short": lambda: [shell_io.tokenize(line) for _ in range(count) for line in SHORT_LINES],
+        "tokenize.long": lambda: shell_io.tokenize(long_line),
+        "populate_values": lambda: [
+            context.populate_values(template) for _ in range(count) for template in bench_context.TEMPLATES
+        ],
+        "builtin.cat": lambda: builtins.Builtin.cat(None, devnull, big_file),
+        "builtin.wc": lambda: builtins.Builtin.wc(None, io.StringIO(), big_file),
+    }
+
+    external_cat = shutil.which("cat")
+    if external_cat is None:
+        print("cat not found in PATH, pipeline cases are skipped", file=sys.stderr)
+        return cases
+    executor = executor_lib.Executor()
+    env = {"PATH": os.environ.get("PATH", os.defpath)}
+    for stages in PIPELINE_STAGES:
+        pipeline = make_pipeline(stages, pipeline_file, external_cat)
+        cases[f"pipeline.{stages}"] = lambda pipeline=pipeline: executor.execute_pipeline(env, pipeline)
+    return cases
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="множитель числа итераций и длины строк")
+    parser.add_argument("--size", default="64M", help="размер файла для cat и wc")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="запускать только случаи, в имени которых есть подстрока")
+    parser.add_argument("--output", metavar="FILE", help="сохранить результаты в FILE в формате JSON")
+    parser.add_argument("--compare", metavar="FILE", help="сравнить с результатами, сохранёнными ранее")
+    parser.add_argument("--threshold", type=float, default=0.1, help="допустимое замедление, доля от базового")
+    args = parser.parse_args()
+
+    results: dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        cases = make_cases(tmp, args.scale, common.parse_size(args.size), devnull)
+        # Конвейеры пишут в sys.stdout, его вывод бенчмарку не нужен
+        with contextlib.redirect_stdout(devnull):
+            for name, fn in cases.items():
+                if args.filter in name:
+                    results[name] = common.measure(fn, args.repeat)
+
+    if args.output is not None:
+        common.save_results(args.output, results)
+
+    if args.compare is None:
+        common.print_table(["case", "best, ms"], [[name, f"{seconds * 1000:.2f}"] for name, seconds in results.items()])
+        return 0
+
+    rows, regressions = common.compare_results(common.load_results(args.compare), results, args.threshold)
+    common.print_table(["case", "baseline, ms", "current, ms", "ratio", "verdict"], rows)
+    if regressions:
+        print(f"regressions: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
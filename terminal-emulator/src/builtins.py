@@ -1,8 +1,248 @@
+import contextlib
+import contextvars
+import errno
+import functools
 import io
 import os
+import sys
+import threading
+import typing
 
 import src.exceptions as exceptions
+import src.history as history_lib
+import src.jobs as jobs_lib
 import src.models as models
+import src.path_cache as path_cache_lib
+import src.result_cache as result_cache_lib
+
+
+CHUNK_SIZE = 64 * 1024  # Размер порции при потоковом чтении входа
+FILE_CHUNK_SIZE = 1024 * 1024  # Размер порции при чтении обычных файлов
+SENDFILE_CHUNK_SIZE = 64 * 1024 * 1024  # Максимум байт за один вызов os.sendfile
+PREFETCH_SIZE = 64 * 1024 * 1024  # Сколько байт следующего файла cat просит ядро прочитать заранее
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024  # С какого суммарного размера файлов wc считает их параллельно
+WHITESPACE = b" \t\n\r\x0b\x0c"
+# Окружение выполняемой встроенной команды, его задаёт Executor.run_builtin в потоке команды
+current_env: contextvars.ContextVar[typing.Mapping[str, str]] = contextvars.ContextVar("current_env", default=os.environ)
+# Признак отмены конвейера выполняемой встроенной команды, его тоже задаёт Executor.run_builtin
+current_cancelled: contextvars.ContextVar[threading.Event | None] = contextvars.ContextVar(
+    "current_cancelled", default=None
+)
+# Переводит пробельные байты в 0, остальные в 1: начало слова - это пара b"\x00\x01"
+WORD_TABLE = bytes(0 if byte in WHITESPACE else 1 for byte in range(256))
+
+
+def check_cancelled() -> None:
+    """Прерывает встроенную команду, если её конвейер отменён
+
+    Вызывается между порциями данных, поэтому прерывается и команда, читающая бесконечный вход.
+    :raises CancelledError: если конвейер отменён через Executor.cancel
+    """
+    cancelled = current_cancelled.get()
+    if cancelled is not None and cancelled.is_set():
+        raise exceptions.CancelledError()
+
+
+def binary_reader(in_io: io.TextIOBase) -> typing.BinaryIO | None:
+    """Возвращает бинарный поток под текстовым входом, если из него можно читать байты напрямую
+
+    Для sys.stdin байтовое чтение небезопасно: часть ввода уже могла быть
+    прочитана в буфер текстового слоя при чтении команды.
+    """
+    if in_io is sys.stdin:
+        return None
+    return getattr(in_io, "buffer", None)
+
+
+def binary_writer(out_io: io.TextIOBase) -> typing.BinaryIO | None:
+    """Возвращает бинарный поток под текстовым выходом, предварительно сбросив текстовый буфер"""
+    buffer = getattr(out_io, "buffer", None)
+    if buffer is not None:
+        out_io.flush()
+    return buffer
+
+
+def output_fd(out_io: io.TextIOBase) -> int | None:
+    """Дескриптор, стоящий за выходным потоком, или None, если это не файл ОС"""
+    try:
+        return out_io.fileno()
+    except (AttributeError, ValueError, io.UnsupportedOperation):
+        return None
+
+
+def send_file(filename: str, out_fd: int, writer: typing.BinaryIO) -> None:
+    """Копирует файл в out_fd через os.sendfile без чтения данных в Python
+
+    Если sendfile не поддерживается для этой пары дескрипторов (например,
+    out_fd открыт с O_APPEND или файл не обычный), файл копируется порциями через writer.
+    """
+    with open(filename, "rb", buffering=0) as f:
+        offset = 0
+        try:
+            while sent := os.sendfile(out_fd, f.fileno(), offset, SENDFILE_CHUNK_SIZE):
+                offset += sent
+                check_cancelled()
+            return
+        except OSError as e:
+            if offset or e.errno not in (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+                raise
+    for chunk in iter_file_chunks(filename):
+        writer.write(chunk)
+        writer.flush()
+
+
+def iter_chunks(in_io: io.TextIOBase) -> typing.Iterator[bytes]:
+    """Читает входной поток порциями байтов по мере их поступления
+
+    Если бинарный буфер недоступен, текст кодируется обратно в UTF-8,
+    байты, не являющиеся UTF-8 (surrogateescape), восстанавливаются как есть.
+    """
+    reader = binary_reader(in_io)
+    if reader is not None:
+        read = getattr(reader, "read1", reader.read)
+        while chunk := read(CHUNK_SIZE):
+            check_cancelled()
+            yield chunk
+    else:
+        while text := in_io.read(CHUNK_SIZE):
+            check_cancelled()
+            yield text.encode(errors="surrogateescape")
+
+
+def iter_file_chunks(filename: str, offset: int = 0) -> typing.Iterator[bytes | bytearray]:
+    """Читает файл с позиции offset порциями в один переиспользуемый буфер, память не зависит от размера файла
+
+    Возвращаемая порция действительна только до следующей итерации.
+    """
+    buffer = bytearray(FILE_CHUNK_SIZE)
+    with open(filename, "rb", buffering=0) as f:
+        if offset:
+            f.seek(offset)
+        while size := f.readinto(buffer):
+            check_cancelled()
+            yield buffer if size == len(buffer) else buffer[:size]
+
+
+def copy_text(src: typing.IO[str], dst: typing.IO[str]) -> None:
+    """Копирует текст порциями, как shutil.copyfileobj, с проверкой отмены между порциями"""
+    while text := src.read(CHUNK_SIZE):
+        check_cancelled()
+        dst.write(text)
+
+
+def prefetch_file(filename: str) -> None:
+    """Просит ядро заранее прочитать начало файла в page cache, не дожидаясь чтения"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(filename, os.O_RDONLY)
+    except OSError:
+        # Ошибку сообщит само чтение файла
+        return
+    try:
+        os.posix_fadvise(fd, 0, PREFETCH_SIZE, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def iter_files_chunks(filenames: typing.Sequence[str]) -> typing.Iterator[bytes | bytearray]:
+    """Читает файлы подряд, запрашивая упреждающее чтение следующего файла, пока выводится текущий"""
+    for index, filename in enumerate(filenames):
+        if index + 1 < len(filenames):
+            prefetch_file(filenames[index + 1])
+        yield from iter_file_chunks(filename)
+
+
+def count_file_stats(filename: str) -> tuple[int, int, int, bool]:
+    """Статистика одного файла и признак того, что он кончается внутри слова
+
+    Выполняется в том числе в процессах пула wc.
+    """
+    return resume_stats(iter_file_chunks(filename), False)
+
+
+def cached_file_stats(
+    filenames: typing.Sequence[str], count_many: typing.Callable[[list[str]], typing.Iterable[tuple[int, int, int, bool]]]
+) -> list[tuple[int, int, int, bool]]:
+    """Статистика файлов через кеш результатов
+
+    Непосчитанные и изменённые файлы передаются в count_many одним списком,
+    чтобы их можно было посчитать параллельно. У дописанного файла читается
+    только новый хвост, и его статистика прибавляется к сохранённой.
+    """
+    cache = result_cache_lib.result_cache
+    lookups = [cache.lookup("wc", (), filename) for filename in filenames]
+    missing = [filename for filename, (kind, _, _) in zip(filenames, lookups) if kind in ("miss", "uncached")]
+    counted = dict(zip(missing, count_many(missing)))
+
+    results = []
+    for filename, (kind, entry, st) in zip(filenames, lookups):
+        if entry is None:
+            stats = counted[filename]
+        elif kind == "append":
+            lines, words, bytes_count, in_word = entry.value
+            tail = resume_stats(iter_file_chunks(filename, entry.size), in_word)
+            stats = (lines + tail[0], words + tail[1], bytes_count + tail[2], tail[3])
+        else:
+            stats = entry.value
+        # Файл, изменившийся во время подсчёта, не запоминается: результат не соответствует st
+        if kind != "hit" and kind != "uncached" and stats[2] == st.st_size:
+            cache.store("wc", (), filename, st, stats)
+        results.append(stats)
+    return results
+
+
+def wc_workers(filenames: typing.Sequence[str], jobs: str | None) -> int:
+    """Число процессов для подсчёта файлов: из -j N или автоматически
+
+    Автоматически файлы считаются параллельно, только если их суммарный размер
+    окупает запуск пула процессов.
+    """
+    if jobs is not None and jobs.isdigit() and int(jobs) > 0:
+        return min(int(jobs), len(filenames))
+    if len(filenames) < 2:
+        return 1
+    try:
+        total_size = sum(os.path.getsize(filename) for filename in filenames)
+    except OSError:
+        return 1
+    if total_size < PARALLEL_MIN_BYTES:
+        return 1
+    return min(os.cpu_count() or 1, len(filenames))
+
+
+def count_stats(chunks: typing.Iterable[bytes | bytearray]) -> tuple[int, int, int]:
+    """Считает строки, слова и байты за один проход по порциям
+
+    Слова считаются по переходам от пробельного байта к непробельному без
+    создания списка слов. Слово, разрезанное границей порций, считается один раз.
+    """
+    return resume_stats(chunks, False)[:3]
+
+
+def resume_stats(chunks: typing.Iterable[bytes | bytearray], in_word: bool) -> tuple[int, int, int, bool]:
+    """Продолжает подсчёт с места, где предыдущие данные кончились внутри слова (in_word) или нет
+
+    Возвращает строки, слова и байты в chunks и признак того, что они кончаются внутри слова.
+    """
+    lines, words, bytes_count = 0, 0, 0
+    for chunk in chunks:
+        lines += chunk.count(b"\n")
+        mask = chunk.translate(WORD_TABLE)
+        words += mask.count(b"\x00\x01")
+        if not in_word and mask[0]:
+            words += 1
+        in_word = bool(mask[-1])
+        bytes_count += len(chunk)
+    return lines, words, bytes_count, in_word
+
+
+def parse_job_id(arg: str) -> int:
+    """Номер задачи из аргумента вида 1 или %1, -1 для некорректного"""
+    value = arg.removeprefix("%")
+    return int(value) if value.isdigit() else -1
 
 
 class Builtin:
@@ -16,6 +256,10 @@ class Builtin:
     - echo: вывод аргументов в поток
     - wc: подсчет строк, слов и байтов
     - pwd: вывод текущей директории
+    - hash: просмотр и сброс кеша путей к внешним программам
+    - cache: статистика и сброс кеша результатов встроенных команд
+    - history: просмотр и поиск истории команд
+    - jobs, wait, fg: управление фоновыми задачами
     - exit: завершение работы оболочки
     """
 
@@ -31,12 +275,27 @@ class Builtin:
         :param args: имена файлов для обработки
         :raises FileNotFoundError: если файл не найден
         """
-        if not args:
-            out_io.write(in_io.read())
-        else:
+        writer = binary_writer(out_io)
+        if writer is None:
+            # Выход без бинарного буфера (например, io.StringIO) принимает только текст
+            if not args:
+                copy_text(typing.cast(typing.IO[str], in_io), typing.cast(typing.IO[str], out_io))
             for filename in args:
-                with open(filename, 'r') as f:
-                    out_io.write(f.read())
+                # Байты, не являющиеся UTF-8, проходят как surrogateescape и восстанавливаются при записи в pipe
+                with open(filename, 'r', encoding="utf-8", errors="surrogateescape") as f:
+                    copy_text(f, typing.cast(typing.IO[str], out_io))
+        elif args and (out_fd := output_fd(out_io)) is not None:
+            # Выход - терминал, файл или pipe: файлы копирует ядро, данные не попадают в Python
+            for index, filename in enumerate(args):
+                if index + 1 < len(args):
+                    prefetch_file(args[index + 1])
+                send_file(filename, out_fd, writer)
+        else:
+            # Байты копируются без декодирования и кодирования обратно
+            chunks = iter_chunks(in_io) if not args else iter_files_chunks(args)
+            for chunk in chunks:
+                writer.write(chunk)
+                writer.flush()
         out_io.write("\n")
         
         return models.ProcessResult(0)
@@ -65,24 +324,33 @@ class Builtin:
         :param args: имена файлов для анализа
         :raises FileNotFoundError: если файл не найден
         """
-
-        def count_stats(text):
-            """Вспомогательная функция для подсчета статистики текста"""
-            lines = text.count('\n')
-            words = len(text.split())
-            bytes_count = len(text.encode())
-            return lines, words, bytes_count
-
         if not args:
-            text = in_io.read()
-            lines, words, bytes_count = count_stats(text)
+            lines, words, bytes_count = count_stats(iter_chunks(in_io))
             out_io.write(f"{lines} {words} {bytes_count}\n")
         else:
             total_lines, total_words, total_bytes = 0, 0, 0
-            for filename in args:
-                with open(filename, 'r') as f:
-                    text = f.read()
-                    lines, words, bytes_count = count_stats(text)
+            with contextlib.ExitStack() as stack:
+                workers = wc_workers(args, kwargs.get("j"))
+                if workers > 1:
+                    # Подсчёт упирается в процессор, поэтому файлы считаются в разных процессах.
+                    # map отдаёт результаты в порядке аргументов, строки выводятся детерминированно.
+                    # Пул процессов импортируется только здесь: он заметно замедляет запуск оболочки
+                    import concurrent.futures
+                    import multiprocessing
+
+                    pool = stack.enter_context(concurrent.futures.ProcessPoolExecutor(
+                        max_workers=workers, mp_context=multiprocessing.get_context("forkserver")
+                    ))
+                    count_many = functools.partial(pool.map, count_file_stats)
+                else:
+                    count_many = functools.partial(map, count_file_stats)
+                # Результаты не собираются в список: строка файла выводится, как только он посчитан
+                results: typing.Iterable[tuple[int, int, int, bool]]
+                if result_cache_lib.result_cache.enabled:
+                    results = cached_file_stats(args, count_many)
+                else:
+                    results = count_many(args)
+                for filename, (lines, words, bytes_count, _) in zip(args, results):
                     total_lines += lines
                     total_words += words
                     total_bytes += bytes_count
@@ -90,7 +358,7 @@ class Builtin:
 
             if len(args) > 1:
                 out_io.write(f"{total_lines} {total_words} {total_bytes} total\n")
-        
+
         return models.ProcessResult(0)
 
     @staticmethod
@@ -105,6 +373,165 @@ class Builtin:
         
         return models.ProcessResult(0)
 
+    @staticmethod
+    def hash(in_io: io.TextIOBase, out_io: io.TextIOBase, *args, **kwargs) -> models.ProcessResult:
+        """Показывает и изменяет кеш путей к внешним программам.
+
+        Без аргументов выводит закешированные для текущего PATH пути и число
+        их использований. С флагом -r очищает кеш. Имена программ в аргументах
+        ищутся в PATH текущего контекста и добавляются в кеш.
+
+        :param in_io: входной поток (не используется)
+        :param out_io: выходной поток для вывода таблицы
+        :param args: -r и/или имена программ
+        """
+        cache = path_cache_lib.path_cache
+        path_value = current_env.get().get("PATH")
+        names = [name for name in args if name != "-r"]
+        if "-r" in args or "r" in kwargs:
+            cache.clear()
+            if "r" in kwargs:
+                # "hash -r ls" разбирается как флаг r со значением ls
+                names.append(kwargs["r"])
+
+        code = 0
+        for name in names:
+            if cache.resolve(name, path_value, count_hit=False) is None:
+                out_io.write(f"hash: {name}: not found\n")
+                code = 1
+
+        if not args and not kwargs:
+            with cache.lock:
+                rows = [(cache.hits[key], path) for key, path in cache.entries.items() if key[1] == path_value]
+            if not rows:
+                out_io.write("hash: hash table empty\n")
+            else:
+                out_io.write("hits\tcommand\n")
+                for hits, path in rows:
+                    out_io.write(f"{hits:4}\t{path}\n")
+
+        return models.ProcessResult(code)
+
+    @staticmethod
+    def cache(in_io: io.TextIOBase, out_io: io.TextIOBase, *args, **kwargs) -> models.ProcessResult:
+        """Показывает статистику кеша результатов встроенных команд.
+
+        Выводит число попаданий, досчётов дописанных файлов, промахов,
+        записей и их примерный размер. С флагом -r очищает кеш и счётчики.
+
+        :param in_io: входной поток (не используется)
+        :param out_io: выходной поток для вывода статистики
+        :param args: -r для очистки кеша
+        """
+        cache = result_cache_lib.result_cache
+        if not cache.enabled:
+            out_io.write("cache: result cache is disabled\n")
+            return models.ProcessResult(1)
+        if "-r" in args or "r" in kwargs:
+            cache.clear()
+            return models.ProcessResult(0)
+
+        for kind, count in cache.stats.items():
+            out_io.write(f"{kind}\t{count}\n")
+        out_io.write(f"entries\t{len(cache.entries)}\n")
+        out_io.write(f"memory\t{cache.memory_used}/{cache.memory_budget}\n")
+
+        return models.ProcessResult(0)
+
+    @staticmethod
+    def history(in_io: io.TextIOBase, out_io: io.TextIOBase, *args, **kwargs) -> models.ProcessResult:
+        """Выводит сохранённые команды с их номерами.
+
+        Без аргументов выводит всю историю, с числом N - последние N команд.
+        С флагом -p PREFIX выводит команды, начинающиеся с PREFIX,
+        с флагом -s TEXT - команды, содержащие TEXT.
+
+        :param in_io: входной поток (не используется)
+        :param out_io: выходной поток для вывода команд
+        :param args: число N
+        :param kwargs: p или s со строкой поиска
+        """
+        history = history_lib.history
+        if not history.enabled:
+            out_io.write("history: history is disabled\n")
+            return models.ProcessResult(1)
+
+        if "p" in kwargs or "s" in kwargs:
+            entries = history.search(kwargs.get("p", kwargs.get("s", "")), prefix="p" in kwargs)
+        elif args:
+            if not args[0].isdigit():
+                raise exceptions.UsageError(f"{args[0]}: numeric argument required")
+            entries = history.entries(len(history) - int(args[0]))
+        else:
+            entries = history.entries()
+        for number, command in entries:
+            out_io.write(f"{number:5}  {command}\n")
+
+        return models.ProcessResult(0)
+
+    @staticmethod
+    def jobs(in_io: io.TextIOBase, out_io: io.TextIOBase, *args, **kwargs) -> models.ProcessResult:
+        """Выводит список фоновых задач и их состояние.
+
+        Завершённые задачи удаляются из списка после вывода.
+
+        :param in_io: входной поток (не используется)
+        :param out_io: выходной поток для вывода списка
+        :param args: аргументы (игнорируются)
+        """
+        for job in jobs_lib.controller.list():
+            out_io.write(job.describe() + "\n")
+            jobs_lib.controller.forget(job)
+
+        return models.ProcessResult(0)
+
+    @staticmethod
+    def wait(in_io: io.TextIOBase, out_io: io.TextIOBase, *args, **kwargs) -> models.ProcessResult:
+        """Дожидается завершения фоновых задач.
+
+        Без аргументов ждёт все задачи. Возвращает код выхода последней
+        из ожидаемых задач.
+
+        :param in_io: входной поток (не используется)
+        :param out_io: выходной поток для сообщений об ошибках
+        :param args: номера задач (1 или %1)
+        """
+        if args:
+            targets = [(arg, jobs_lib.controller.get(parse_job_id(arg))) for arg in args]
+        else:
+            targets = [(str(job.job_id), job) for job in jobs_lib.controller.list()]
+
+        code = 0
+        for arg, job in targets:
+            if job is None:
+                out_io.write(f"wait: {arg}: no such job\n")
+                code = 127
+                continue
+            code = job.wait().code
+            jobs_lib.controller.forget(job)
+
+        return models.ProcessResult(code)
+
+    @staticmethod
+    def fg(in_io: io.TextIOBase, out_io: io.TextIOBase, *args, **kwargs) -> models.ProcessResult:
+        """Переводит фоновую задачу на передний план и дожидается её завершения.
+
+        :param in_io: входной поток (не используется)
+        :param out_io: выходной поток для вывода команды задачи
+        :param args: номер задачи (1 или %1), по умолчанию последняя запущенная
+        """
+        job = jobs_lib.controller.get(parse_job_id(args[0]) if args else None)
+        if job is None:
+            out_io.write("fg: no current job\n")
+            return models.ProcessResult(1)
+
+        out_io.write(job.command_line + "\n")
+        out_io.flush()
+        code = job.wait().code
+        jobs_lib.controller.forget(job)
+
+        return models.ProcessResult(code)
+
     @staticmethod
     def exit(in_io: io.TextIOBase, out_io: io.TextIOBase, *args, **kwargs) -> models.ProcessResult:
         """Завершает выполнение оболочки.
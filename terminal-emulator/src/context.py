@@ -1,4 +1,50 @@
 import abc
+import re
+import types
+import typing
+
+
+# $name and ${name} references, compiled once per process
+REFERENCE_PATTERN = re.compile(r"\$(?:\{(?P<braced>[a-zA-Z_][a-zA-Z0-9_]*)\}|(?P<plain>[a-zA-Z_][a-zA-Z0-9_]*))")
+
+
+class EnvView(typing.Mapping[str, str]):
+    """Read-only view of a stack of variable layers, upper layers win.
+
+    The layers are never modified after the view is created (Context copies a
+    layer before writing to it), so a view is safe to share between threads
+    and costs O(number of layers) to build instead of copying every variable.
+    """
+    __slots__ = ("layers",)
+
+    def __init__(self, layers: tuple[dict[str, str], ...]):
+        self.layers = layers[::-1]
+
+    def __getitem__(self, name: str) -> str:
+        for layer in self.layers:
+            if name in layer:
+                return layer[name]
+        raise KeyError(name)
+
+    def get(self, name: str, default: typing.Any = None) -> typing.Any:
+        for layer in self.layers:
+            if name in layer:
+                return layer[name]
+        return default
+
+    def __contains__(self, name: object) -> bool:
+        return any(name in layer for layer in self.layers)
+
+    def __iter__(self) -> typing.Iterator[str]:
+        seen: set[str] = set()
+        for layer in reversed(self.layers):
+            for name in layer:
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+    def __len__(self) -> int:
+        return len(set().union(*self.layers))
 
 
 class ContextProtocol(abc.ABC):
@@ -13,9 +59,17 @@ class ContextProtocol(abc.ABC):
     @abc.abstractmethod
     def exit_scope(self) -> None:
         ...
+
+    @abc.abstractmethod
+    def push_scope(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    def pop_scope(self) -> None:
+        ...
     
     @abc.abstractmethod
-    def get_env(self) -> dict[str, str]:
+    def get_env(self) -> typing.Mapping[str, str]:
         ...
     
     @abc.abstractmethod
@@ -29,33 +83,111 @@ class ContextProtocol(abc.ABC):
 
 
 class Context(ContextProtocol):
-    def __init__(self):
-        self.unscoped_params: dict[str, str] = {}
-        self.scoped_params: dict[str, str] = {}
+    """Variables stored as a stack of layers with copy-on-write.
+
+    The bottom layers are inherited from the parent context (see child()),
+    then come the unscoped layer of this context and one or more scope layers.
+    Scopes are pushed and popped in O(1). get_env() returns an immutable
+    EnvView over the current layers; after that the layers are shared with
+    the view, and the first write to a shared layer copies only that layer.
+    """
+
+    def __init__(self, parent: "Context | None" = None):
+        inherited = parent.share_layers() if parent is not None else []
+        self.layers: list[dict[str, str]] = [*inherited, {}, {}]
+        # shared[i] is True while layers[i] may be referenced by a view or a child context
+        self.shared: list[bool] = [True] * len(inherited) + [False, False]
+        # Index of the unscoped layer, scope layers are above it
+        self.base = len(inherited)
+        # Incremented on every change of the params
+        self.version = 0
+        # Immutable view of all variables and the version it was built for
+        self.snapshot: typing.Mapping[str, str] = types.MappingProxyType({})
+        self.snapshot_version = 0 if parent is None else -1
+        self.reference_pattern = REFERENCE_PATTERN
+
+    def writable_layer(self, index: int) -> dict[str, str]:
+        """Return layers[index], copying it first if it is shared."""
+        if self.shared[index]:
+            self.layers[index] = dict(self.layers[index])
+            self.shared[index] = False
+        return self.layers[index]
+
+    def share_layers(self) -> list[dict[str, str]]:
+        """Return the current layers, marking them copy-on-write."""
+        self.shared = [True] * len(self.layers)
+        return [layer for layer in self.layers if layer]
+
+    def child(self) -> "Context":
+        """Return a new context that sees the current variables of this one.
+
+        Changes in either context are not visible in the other one. Nothing
+        is copied until one of them writes to an inherited layer.
+        """
+        return Context(self)
 
     def add_unscoped_param(self, name: str, value: str) -> None:
         """Add an environment variable. Cannot be removed by scope."""
-        self.unscoped_params[name] = value
+        self.writable_layer(self.base)[name] = value
+        self.version += 1
 
     def add_scoped_param(self, name: str, value: str) -> None:
-        """Add a temporary variable valid until exit_scope() is called."""
-        self.scoped_params[name] = value
+        """Add a temporary variable valid until the current scope is exited."""
+        self.writable_layer(-1)[name] = value
+        self.version += 1
 
     def exit_scope(self) -> None:
-        """Remove all scoped variables from the current scope."""
-        self.scoped_params.clear()
+        """Remove all variables of the current scope."""
+        if self.layers[-1]:
+            self.layers[-1] = {}
+            self.shared[-1] = False
+            self.version += 1
+
+    def push_scope(self) -> None:
+        """Start a nested scope. Its variables hide the outer ones until pop_scope()."""
+        self.layers.append({})
+        self.shared.append(False)
+
+    def pop_scope(self) -> None:
+        """Drop the innermost scope. The outermost scope is only cleared."""
+        if len(self.layers) - self.base <= 2:
+            self.exit_scope()
+            return
+        self.shared.pop()
+        if self.layers.pop():
+            self.version += 1
+
+    def get_env(self) -> typing.Mapping[str, str]:
+        """Return a read-only snapshot of all current variables.
 
-    def get_env(self) -> dict[str, str]:
-        """Return a dictionary of all current variables."""
-        return {**self.unscoped_params, **self.scoped_params}
+        The snapshot is rebuilt only after the params change, so consecutive
+        calls without changes return the very same object. Building it does
+        not copy the variables.
+        """
+        if self.snapshot_version != self.version:
+            layers = self.share_layers()
+            if len(layers) == 1:
+                self.snapshot = types.MappingProxyType(layers[0])
+            else:
+                self.snapshot = EnvView(tuple(layers))
+            self.snapshot_version = self.version
+        return self.snapshot
 
     def get_value(self, name: str) -> str:
         """Return the value of a variable, or empty string if not found."""
         return self.get_env().get(name, "")
 
     def populate_values(self, template: str) -> str:
-        """Return template filled with variable values."""
-        updated_template = template
-        for k, v in {**self.unscoped_params, **self.scoped_params}.items():
-            updated_template = updated_template.replace(f'${{{k}}}', v)
-        return updated_template
+        """Return template filled with variable values.
+
+        The template is scanned once and only ${name} and $name references
+        found in it are looked up. Unknown references are left as is.
+        """
+        if "$" not in template:
+            return template
+        env = self.get_env()
+
+        def substitute(m: re.Match) -> str:
+            return env.get(m.group("braced") or m.group("plain"), m.group())
+
+        return self.reference_pattern.sub(substitute, template)
@@ -3,4 +3,16 @@ class ExitException(Exception):
 
     Данное исключение используется для корректного завершения работы shell.
     Позволяет IO слою корректно закрыть ресурсы перед выходом из приложения.
-    """
\ No newline at end of file
+    """
+
+class UsageError(Exception):
+    """Неподдерживаемые или некорректные аргументы встроенной команды
+
+    Executor выводит сообщение в stderr с именем команды и завершает её с кодом 2.
+    """
+
+class CancelledError(Exception):
+    """Конвейер встроенной команды прерван через Executor.cancel
+
+    Executor завершает команду с тем же кодом, что и внешнюю программу, получившую SIGTERM.
+    """
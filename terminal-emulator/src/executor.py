@@ -1,113 +1,446 @@
 import abc
+import codecs
 import contextlib
 import io
 import itertools
 import os
-import subprocess
+import signal
 import sys
 import typing
 import threading
+import time
 
 import src.builtins as builtins
+import src.exceptions as exceptions
+import src.metrics as metrics
 import src.models as models
+import src.path_cache as path_cache_lib
+import src.registry as registry_lib
+import src.spawn as spawn
+
+
+RELAY_CHUNK_SIZE = 64 * 1024
 
 
 class ExecutorProtocol(abc.ABC):
     @abc.abstractmethod
-    def execute_pipeline(self, env: dict[str, str], commands: list[models.Command]) -> models.Status:
+    def execute_pipeline(
+        self,
+        env: typing.Mapping[str, str],
+        commands: list[models.Command],
+        stdin: typing.IO[str] | None = None,
+        measure: bool = False,
+        stdout: typing.IO[str] | None = None,
+        stderr: typing.IO[str] | None = None,
+    ) -> models.Status:
         ...
 
+    def cancel(self, thread_id: int) -> None:
+        """Прерывает конвейер, выполняющийся в потоке thread_id; по умолчанию не поддерживается"""
+
 
 class Executor(ExecutorProtocol):
-    def execute_pipeline(self, env: dict[str, str], commands: list[models.Command]) -> models.Status:
+    def __init__(
+        self,
+        spawner: spawn.SpawnerProtocol | None = None,
+        path_cache: path_cache_lib.PathCache | None = None,
+        registry: registry_lib.CommandRegistry | None = None,
+    ):
+        self.spawner = spawner if spawner is not None else spawn.SubprocessSpawner()
+        self.path_cache = path_cache if path_cache is not None else path_cache_lib.path_cache
+        self.registry = registry if registry is not None else registry_lib.registry
+        # Внешние процессы выполняющихся конвейеров по потокам, из которых конвейеры запущены
+        self.running: dict[int, list[spawn.ProcessProtocol]] = {}
+        # Признаки отмены выполняющихся конвейеров по тем же потокам, их проверяют встроенные команды
+        self.cancelled: dict[int, threading.Event] = {}
+        self.running_lock = threading.Lock()
+
+    def execute_pipeline(
+        self,
+        env: typing.Mapping[str, str],
+        commands: list[models.Command],
+        stdin: typing.IO[str] | None = None,
+        measure: bool = False,
+        stdout: typing.IO[str] | None = None,
+        stderr: typing.IO[str] | None = None,
+    ) -> models.Status:
         """
-        Запускает выполнение команды 
+        Запускает выполнение команды
+
+        Если команда есть в реестре self.registry, то будет вызван её обработчик
+        Иначе запускает внешнюю программу через self.spawner
+
+        Все стадии конвейера работают одновременно и соединены pipe-ами ОС,
+        поэтому объём памяти не зависит от размера данных, а вывод начинает
+        поступать в stdout ещё до завершения первых стадий.
+
+        env передаётся процессам как есть, без копирования: снимок из
+        Context.get_env переиспользуется между командами, пока переменные не меняются.
+
+        stdin - вход первой стадии, если она встроенная команда (по умолчанию sys.stdin).
+        stdout и stderr - куда пишут последняя стадия и сообщения об ошибках
+        (по умолчанию sys.stdout и sys.stderr), например буферы сессии сервера.
 
-        Если команда есть в модуле builtins, то будет вызвана она
-        Иначе вызывает subprocess.run(...)
+        Файлы перенаправлений открываются один раз, и их дескрипторы подключаются
+        к стадии вместо pipe-ов: вывод пишется прямо в файл без промежуточных копий.
+
+        Возвращаемый статус содержит время выполнения конвейера, а при measure=True
+        ещё и метрики каждой стадии. Замер стадии встроенной команды стоит десятки
+        микросекунд, поэтому по умолчанию он выключен.
         """
-        previous_stdout = ""
-        for index, command in enumerate(commands):
-            with io.StringIO() as out_io, io.StringIO() as err_io, io.StringIO(initial_value=previous_stdout) as in_io:
+        start = time.perf_counter()
+        stdin = sys.stdin if stdin is None else stdin
+        stdout = sys.stdout if stdout is None else stdout
+        stderr = sys.stderr if stderr is None else stderr
+        thread_id = threading.get_ident()
+        cancelled = self.start_running(thread_id)
+        with contextlib.ExitStack() as relays:
+            relays.callback(self.forget_running, thread_id)
+            # Обработчики ищутся один раз на конвейер, плагины импортируются здесь же
+            handlers: list[registry_lib.Handler | None] = []
+            for index, command in enumerate(commands):
                 try:
-                    if builtin_cmd := getattr(builtins.Builtin, command.name, None):
-                        result: models.ProcessResult = builtin_cmd(
-                            sys.stdin if index == 0 else in_io, out_io, *command.args, **command.kwargs
-                        )
+                    handlers.append(self.registry.get(command.name))
+                except (ImportError, AttributeError) as e:
+                    # Плагин не загрузился: не выполняется только этот конвейер, оболочка работает дальше
+                    stderr.write(f"{command.name}: {e}\n")
+                    return Executor.make_status(index, 1, start)
+
+            if len(commands) == 1 and not commands[0].has_redirects() and (builtin_cmd := handlers[0]):
+                # Частый случай одиночной встроенной команды: без потоков и pipe-ов
+                if not measure:
+                    code = Executor.run_builtin(builtin_cmd, commands[0], stdin, stdout, stderr, env, cancelled)
+                    return Executor.make_status(0, code, start)
+                stage = models.StageMetrics(commands[0].name, True)
+                with metrics.measure_thread(stage):
+                    code = Executor.run_builtin(builtin_cmd, commands[0], stdin, stdout, stderr, env, cancelled)
+                return Executor.make_status(0, code, start, [stage])
+
+            stages = [
+                models.StageMetrics(command.name, handler is not None) for command, handler in zip(commands, handlers)
+            ] if measure else []
+            codes: list[int | None] = [None] * len(commands)
+            errors: list[BaseException | None] = [None] * len(commands)
+            processes: list[tuple[int, float, spawn.ProcessProtocol]] = []
+            threads: list[threading.Thread] = []
+
+            # read_fd: откуда читает текущая стадия (None - первая стадия)
+            read_fd: int | None = None
+            for index, command in enumerate(commands):
+                is_last = index == len(commands) - 1
+                if is_last:
+                    next_read_fd, write_fd = None, None
+                else:
+                    next_read_fd, write_fd = os.pipe()
+
+                try:
+                    read_fd, write_fd = Executor.open_redirects(command, read_fd, write_fd)
+                except OSError as e:
+                    stderr.write(f"{command.name}: {e}\n")
+                    codes[index] = 1
+                    for fd in (read_fd, write_fd):
+                        if fd is not None:
+                            os.close(fd)
+                    read_fd = next_read_fd
+                    continue
+
+                if builtin_cmd := handlers[index]:
+                    thread = threading.Thread(
+                        target=Executor.builtin_stage,
+                        args=(
+                            builtin_cmd,
+                            command,
+                            stdin if read_fd is None else read_fd,
+                            write_fd,
+                            stdout,
+                            stderr,
+                            env,
+                            cancelled,
+                            codes,
+                            errors,
+                            stages[index] if measure else None,
+                            index,
+                        ),
+                    )
+                    thread.start()
+                    threads.append(thread)
+                else:
+                    # Соседние внешние стадии соединены одним pipe-ом напрямую, без копирования в Python
+                    if write_fd is None:
+                        stdout_fd = Executor.stream_fd(stdout, relays)
                     else:
-                        with (
-                            Executor.pipe_in_io(previous_stdout) as wrapped_in_io,
-                            Executor.pipe_out_io(out_io) as wrapped_out_io,
-                            Executor.pipe_out_io(err_io) as wrapped_err_io,
-                        ):
-                            kw_pairs = ((f"--{k}" if len(k) > 1 else f"-{k}", v) for k, v in command.kwargs.items())
-                            subprocess_kwargs = typing.cast(typing.Iterable[str], itertools.chain(*kw_pairs))
-                            result_ = subprocess.run(
-                                [command.name, *command.args, *subprocess_kwargs],
-                                env=env,
-                                stdin=wrapped_in_io,
-                                stdout=wrapped_out_io,
-                                stderr=wrapped_err_io,
-                            )
-                            result = typing.cast(models.ProcessResult, result_)
-                except FileNotFoundError:
-                    sys.stderr.write(f"Command {command.name} not found\n")
-                    status = models.Status()
-                    status.index, status.code = index, -1
-                    return status
-
-                out_io.seek(0)
-                previous_stdout = out_io.read()
-                err_io.seek(0)
-                previous_stderr = err_io.read()
-
-            status = models.Status()
-            status.index, status.code = index, result.returncode
-            if result.returncode != 0:
-                sys.stderr.write(previous_stderr)
-                return status
-        sys.stdout.write(previous_stdout)
-        return status
+                        stdout_fd = write_fd
+                    stderr_fd = Executor.stream_fd(stderr, relays)
+                    try:
+                        process = self.spawn_external(command, env, read_fd, stdout_fd, stderr_fd)
+                        processes.append((index, time.perf_counter(), process))
+                        with self.running_lock:
+                            self.running.setdefault(thread_id, []).append(process)
+                    except FileNotFoundError:
+                        stderr.write(f"Command {command.name} not found\n")
+                        codes[index] = -1
+                    finally:
+                        # Дескрипторы унаследованы дочерним процессом, у родителя они больше не нужны
+                        for fd in (read_fd, write_fd):
+                            if fd is not None:
+                                os.close(fd)
+
+                read_fd = next_read_fd
+
+            for index, spawned_at, process in processes:
+                # Ресурсы и счётчики /proc собираются, только если нужны метрики
+                code = process.wait(measure)
+                with self.running_lock:
+                    # Убранный процесс больше нельзя сигнализировать: его pid может достаться другому
+                    self.running[thread_id].remove(process)
+                if measure:
+                    metrics.record_process(stages[index], spawned_at, process.rusage, process.io_counters)
+                if code == -signal.SIGPIPE and index != len(commands) - 1:
+                    # Следующая стадия закончила чтение раньше, это не ошибка
+                    code = 0
+                codes[index] = code
+            for thread in threads:
+                thread.join()
+
+        for error in errors:
+            if error is not None:
+                raise error
+
+        for index, stage_code in enumerate(codes):
+            if stage_code != 0:
+                return Executor.make_status(index, typing.cast(int, stage_code), start, stages)
+        return Executor.make_status(len(commands) - 1, 0, start, stages)
+
+    def cancel(self, thread_id: int) -> None:
+        """Прерывает конвейер, выполняющийся в потоке thread_id
+
+        Внешним программам отправляется SIGTERM. Встроенные команды проверяют признак
+        отмены между порциями данных и завершаются с кодом -SIGTERM, как внешние программы;
+        потоки-ретрансляторы завершаются сами, получив EOF от завершившихся соседей,
+        после чего execute_pipeline возвращает статус как обычно.
+        Конвейеры других потоков (фоновые задачи, сессии сервера) не затрагиваются.
+        """
+        with self.running_lock:
+            if (cancelled := self.cancelled.get(thread_id)) is not None:
+                cancelled.set()
+            for process in self.running.get(thread_id, ()):
+                with contextlib.suppress(ProcessLookupError):
+                    os.kill(process.pid, signal.SIGTERM)
+
+    def start_running(self, thread_id: int) -> threading.Event:
+        """Регистрирует конвейер потока thread_id и возвращает его новый признак отмены
+
+        Признак всегда новый: отмена прошлого конвейера не должна прервать следующий.
+        """
+        cancelled = threading.Event()
+        with self.running_lock:
+            self.cancelled[thread_id] = cancelled
+        return cancelled
+
+    def forget_running(self, thread_id: int) -> None:
+        with self.running_lock:
+            self.running.pop(thread_id, None)
+            self.cancelled.pop(thread_id, None)
+
+    def spawn_external(
+        self,
+        command: models.Command,
+        env: typing.Mapping[str, str],
+        stdin: int | None,
+        stdout: int,
+        stderr: int,
+    ) -> spawn.ProcessProtocol:
+        """Находит программу через кеш путей и запускает её
+
+        Отсутствующая в PATH программа не запускается вовсе. Если программу по
+        закешированному пути удалили, путь ищется заново.
+        :raises FileNotFoundError: если программа не найдена
+        """
+        argv = Executor.make_argv(command)
+        path_value = env.get("PATH")
+        for _ in range(2):
+            executable = self.path_cache.resolve(command.name, path_value)
+            if executable is None:
+                break
+            try:
+                return self.spawner.spawn(executable, argv, env, stdin, stdout, stderr)
+            except FileNotFoundError:
+                self.path_cache.forget(command.name, path_value)
+        raise FileNotFoundError(command.name)
 
-    @contextlib.contextmanager
     @staticmethod
-    def pipe_in_io(maybe_s: str | None) -> typing.Generator[io.FileIO, None, None]:
-        """Оборачивает строку в FileIO или возвращает sys.stdin, если строки нет"""
-        if maybe_s is None:
+    def open_redirects(
+        command: models.Command,
+        read_fd: int | None,
+        write_fd: int | None,
+    ) -> tuple[int | None, int | None]:
+        """Открывает файлы перенаправлений команды и возвращает дескрипторы входа и выхода стадии
+
+        Заменённые файлами концы pipe-ов закрываются: предыдущая стадия получит
+        EPIPE, следующая - EOF, как в bash.
+        :raises OSError: если файл не удалось открыть, переданные дескрипторы при этом не закрываются
+        """
+        in_fd = None
+        if command.stdin is not None:
+            in_fd = os.open(command.stdin, os.O_RDONLY)
+        if command.stdout is not None:
+            flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if command.append else os.O_TRUNC)
             try:
-                yield typing.cast(io.FileIO, sys.stdin)
-            finally:
-                return
+                out_fd = os.open(command.stdout, flags, 0o666)
+            except OSError:
+                if in_fd is not None:
+                    os.close(in_fd)
+                raise
+            if write_fd is not None:
+                os.close(write_fd)
+            write_fd = out_fd
+        if in_fd is not None:
+            if read_fd is not None:
+                os.close(read_fd)
+            read_fd = in_fd
+        return read_fd, write_fd
 
-        r, w = os.pipe()
+    @staticmethod
+    def make_status(
+        index: int,
+        code: int,
+        start: float | None = None,
+        stages: list[models.StageMetrics] | None = None,
+    ) -> models.Status:
+        status = models.Status()
+        status.index, status.code = index, code
+        if start is not None:
+            status.wall_time = time.perf_counter() - start
+        if stages is not None:
+            status.stages = stages
+        return status
 
-        def target():
-            os.write(w, maybe_s.encode())
-            os.close(w)
+    @staticmethod
+    def make_argv(command: models.Command) -> list[str]:
+        """Собирает argv внешней программы, именованные аргументы превращаются во флаги"""
+        kw_pairs = ((f"--{k}" if len(k) > 1 else f"-{k}", v) for k, v in command.kwargs.items())
+        subprocess_kwargs = typing.cast(typing.Iterable[str], itertools.chain(*kw_pairs))
+        return [command.name, *command.args, *subprocess_kwargs]
 
-        t = threading.Thread(target=target)
+    @staticmethod
+    def run_builtin(
+        builtin_cmd: typing.Callable[..., models.ProcessResult],
+        command: models.Command,
+        in_io: typing.IO[str],
+        out_io: typing.IO[str],
+        err_io: typing.IO[str],
+        env: typing.Mapping[str, str] | None = None,
+        cancelled: threading.Event | None = None,
+    ) -> int:
+        """Вызывает встроенную команду и превращает ошибки файлов и аргументов в код возврата
+
+        env и признак отмены cancelled на время выполнения доступны команде
+        через builtins.current_env и builtins.current_cancelled.
+        """
+        token = builtins.current_env.set(env) if env is not None else None
+        cancelled_token = builtins.current_cancelled.set(cancelled)
         try:
-            t.start()
-            with io.FileIO(r, "r", closefd=True) as file:
-                yield file
+            result = builtin_cmd(in_io, out_io, *command.args, **command.kwargs)
+        except BrokenPipeError:
+            # Читатель закрыл pipe, дальше писать некуда
+            return 0
+        except exceptions.CancelledError:
+            return -signal.SIGTERM
+        except OSError as e:
+            err_io.write(f"{command.name}: {e}\n")
+            return 1
+        except exceptions.UsageError as e:
+            err_io.write(f"{command.name}: {e}\n")
+            return 2
         finally:
-            t.join()
+            if token is not None:
+                builtins.current_env.reset(token)
+            builtins.current_cancelled.reset(cancelled_token)
+        return result.returncode
+
+    @staticmethod
+    def builtin_stage(
+        builtin_cmd: typing.Callable[..., models.ProcessResult],
+        command: models.Command,
+        read_from: int | typing.IO[str],
+        write_fd: int | None,
+        stdout: typing.IO[str],
+        stderr: typing.IO[str],
+        env: typing.Mapping[str, str],
+        cancelled: threading.Event,
+        codes: list[int | None],
+        errors: list[BaseException | None],
+        stage: models.StageMetrics | None,
+        index: int,
+    ) -> None:
+        """Выполняет встроенную команду в отдельном потоке как стадию конвейера
 
+        read_from - дескриптор pipe-а от предыдущей стадии или поток для первой стадии.
+        Владеет переданными дескрипторами и закрывает их по завершении,
+        чтобы соседние стадии получили EOF или EPIPE.
+        """
+        # Метрики охватывают и закрытие потоков: при нём в pipe сбрасывается остаток буфера
+        measured = metrics.measure_thread(stage) if stage is not None else contextlib.nullcontext()
+        with measured, contextlib.ExitStack() as stack:
+            # surrogateescape пропускает байты, не являющиеся UTF-8, через стадию без изменений
+            if isinstance(read_from, int):
+                in_io: typing.IO[str] = stack.enter_context(
+                    open(read_from, "r", encoding="utf-8", errors="surrogateescape")
+                )
+            else:
+                in_io = read_from
+            out_io = stdout
+            if write_fd is not None:
+                out_io = open(write_fd, "w", encoding="utf-8", errors="surrogateescape")
+                stack.callback(Executor.close_quietly, out_io)
+            try:
+                codes[index] = Executor.run_builtin(builtin_cmd, command, in_io, out_io, stderr, env, cancelled)
+            except BaseException as e:
+                codes[index] = -1
+                errors[index] = e
+
+    @staticmethod
+    def close_quietly(stream: typing.IO[str]) -> None:
+        """Закрывает поток, игнорируя EPIPE при сбросе буфера"""
+        with contextlib.suppress(BrokenPipeError):
+            stream.close()
+
+    @staticmethod
+    def stream_fd(stream: typing.IO[str], relays: contextlib.ExitStack) -> int:
+        """Возвращает дескриптор, в который внешняя программа может писать вывод для stream
+
+        Если за потоком стоит настоящий дескриптор (терминал, файл, pipe), он
+        отдаётся процессу как есть. Иначе (например, io.StringIO) создаётся
+        pipe с потоком-ретранслятором.
+        """
+        try:
+            fd = stream.fileno()
+        except (AttributeError, ValueError, io.UnsupportedOperation):
+            return relays.enter_context(Executor.pipe_out_io(stream))
+        # Всё, что уже записано через Python, должно оказаться раньше вывода процесса
+        stream.flush()
+        return fd
 
     @contextlib.contextmanager
     @staticmethod
-    def pipe_out_io(out_io: io.StringIO) -> typing.Generator[io.FileIO, None, None]:
-        """Оборачивает io.StringIO в FileIO"""
+    def pipe_out_io(out_io: typing.IO[str]) -> typing.Generator[int, None, None]:
+        """Возвращает дескриптор pipe-а, всё записанное в который по мере поступления копируется в out_io"""
         r, w = os.pipe()
 
         def target():
-            while next_byte := os.read(r, 4096):
-                out_io.write(next_byte.decode())
+            # Инкрементальный декодер не ломает многобайтовые символы на границе порций
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            with io.FileIO(r, "r", closefd=True) as file:
+                while next_bytes := file.read(RELAY_CHUNK_SIZE):
+                    out_io.write(decoder.decode(next_bytes))
+                    out_io.flush()
+                out_io.write(decoder.decode(b"", final=True))
 
         t = threading.Thread(target=target)
         try:
             t.start()
-            with io.FileIO(w, "w", closefd=True) as file:
-                yield file
+            yield w
         finally:
+            # EOF придёт в поток, когда дочерние процессы тоже закроют свои копии дескриптора
+            os.close(w)
             t.join()
@@ -0,0 +1,183 @@
+import asyncio
+import codecs
+import concurrent.futures
+import contextlib
+import io
+import os
+import signal
+import sys
+import threading
+import typing
+
+import src.history as history_lib
+import src.io as io_lib
+import src.models as models
+
+
+READ_CHUNK_SIZE = 64 * 1024
+PROMPT = "[ terminal ]: "
+EOF = None  # Признак конца ввода в очередях, его не отбрасывает Ctrl-C
+
+QueueItem = tuple[int, str | None]  # Поколение ввода и команда
+
+
+class AsyncFrontend:
+    """Ввод команд на цикле событий asyncio: следующие строки читаются и разбираются, пока выполняется текущая
+
+    Одновременно работают три стадии:
+    - чтение: stdin читается по готовности дескриптора (loop.add_reader), цикл событий
+      не блокируется; строки с \\ в конце склеиваются, пустые строки и комментарии пропускаются
+    - разбор: прочитанные команды заранее разбираются через IO.parse_cached, и к моменту
+      выполнения разбор берётся из кеша
+    - выполнение: команды выполняются строго по порядку в одном потоке переднего плана,
+      поэтому переменные ведут себя так же, как при последовательном чтении
+
+    Ctrl-C прерывает выполняющийся конвейер через Executor.cancel и, как терминал,
+    отбрасывает уже введённые, но ещё не выполненные строки; оболочка продолжает работу.
+    Stdin занят чтением команд, поэтому встроенная команда в начале конвейера получает пустой вход.
+    """
+
+    def __init__(
+        self,
+        shell: io_lib.IO,
+        stdin_fd: int = 0,
+        interactive: bool | None = None,
+        stdout: typing.IO[str] | None = None,
+        stderr: typing.IO[str] | None = None,
+    ):
+        self.shell = shell
+        self.stdin_fd = stdin_fd
+        self.interactive = os.isatty(stdin_fd) if interactive is None else interactive
+        self.stdout = stdout
+        self.stderr = stderr
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.buffer = ""  # Прочитанный текст после последнего перевода строки
+        self.command = ""  # Команда, собираемая из строк с продолжением
+        # Увеличивается на каждый Ctrl-C, команды прошлых поколений не выполняются
+        self.generation = 0
+        self.busy = False
+        self.foreground_thread: int | None = None
+        self.lines: asyncio.Queue[QueueItem] = asyncio.Queue()
+        self.parsed: asyncio.Queue[QueueItem] = asyncio.Queue()
+
+    async def run(self) -> int:
+        """Выполняет команды до конца ввода и возвращает код выхода последней команды
+
+        :raises ExitException: если выполнена команда exit
+        """
+        loop = asyncio.get_running_loop()
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="foreground")
+        self.foreground_thread = await loop.run_in_executor(pool, threading.get_ident)
+        loop.add_signal_handler(signal.SIGINT, self.interrupt)
+        tasks = [asyncio.create_task(self.parse_ahead())]
+        try:
+            loop.add_reader(self.stdin_fd, self.on_readable)
+            watched = True
+        except PermissionError:
+            # Обычный файл нельзя ждать через epoll, он читается в потоке без ожидания готовности
+            watched = False
+            tasks.append(asyncio.create_task(self.read_file(loop)))
+        try:
+            return await self.execute_all(loop, pool)
+        finally:
+            if watched:
+                loop.remove_reader(self.stdin_fd)
+            loop.remove_signal_handler(signal.SIGINT)
+            for task in tasks:
+                task.cancel()
+            pool.shutdown()
+
+    def on_readable(self) -> None:
+        """Читает то, что уже есть в stdin: os.read после сигнала готовности не блокируется"""
+        try:
+            chunk = os.read(self.stdin_fd, READ_CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        if not chunk:
+            asyncio.get_running_loop().remove_reader(self.stdin_fd)
+        self.feed(chunk)
+
+    async def read_file(self, loop: asyncio.AbstractEventLoop) -> None:
+        while chunk := await loop.run_in_executor(None, os.read, self.stdin_fd, READ_CHUNK_SIZE):
+            self.feed(chunk)
+        self.feed(b"")
+
+    def feed(self, chunk: bytes) -> None:
+        """Делит прочитанные байты на команды и ставит их в очередь разбора; пустой chunk - конец ввода"""
+        self.buffer += self.decoder.decode(chunk, final=not chunk)
+        *complete, self.buffer = self.buffer.split("\n")
+        if not chunk:
+            complete.append(self.buffer)
+            self.buffer = ""
+        for line in complete:
+            self.add_line(line)
+        if not chunk:
+            if self.command:
+                self.lines.put_nowait((self.generation, self.command))
+                self.command = ""
+            self.lines.put_nowait((self.generation, EOF))
+
+    def add_line(self, line: str) -> None:
+        snippet = line.strip()
+        if snippet.endswith("\\"):
+            self.command += snippet[:-1]
+            return
+        self.command += snippet
+        if self.command and not self.command.startswith("#"):
+            if self.interactive:
+                history_lib.history.add(self.command)
+            self.lines.put_nowait((self.generation, self.command))
+        else:
+            self.show_prompt()
+        self.command = ""
+
+    async def parse_ahead(self) -> None:
+        """Разбирает команды из очереди, пока предыдущие выполняются"""
+        while True:
+            generation, command = await self.lines.get()
+            if command is not EOF and generation == self.generation:
+                # Ошибка разбора не кешируется и будет выведена при выполнении строки, в порядке ввода
+                with contextlib.suppress(Exception):
+                    self.shell.parse_cached(command)
+            self.parsed.put_nowait((generation, command))
+
+    async def execute_all(self, loop: asyncio.AbstractEventLoop, pool: concurrent.futures.Executor) -> int:
+        code = 0
+        self.show_prompt()
+        while True:
+            generation, command = await self.parsed.get()
+            if command is EOF:
+                return code
+            if generation == self.generation:
+                self.busy = True
+                try:
+                    status = await loop.run_in_executor(pool, self.execute, command)
+                finally:
+                    self.busy = False
+                if status is not None:
+                    code = status.code
+            self.show_prompt()
+
+    def execute(self, command: str) -> models.Status | None:
+        return self.shell.execute_command(command, stdout=self.stdout, stderr=self.stderr, stdin=io.StringIO())
+
+    def interrupt(self) -> None:
+        """Ctrl-C: прерывает конвейер переднего плана и отбрасывает невыполненный ввод"""
+        self.generation += 1
+        self.buffer = self.command = ""
+        if self.interactive:
+            self.write("\n")
+        if self.busy:
+            self.shell.executor.cancel(typing.cast(int, self.foreground_thread))
+        else:
+            self.show_prompt()
+
+    def show_prompt(self) -> None:
+        """Выводит приглашение, если оболочка ждёт ввода и в очередях нет команд"""
+        if self.interactive and not self.busy and self.lines.empty() and self.parsed.empty():
+            self.write(PROMPT)
+
+    def write(self, text: str) -> None:
+        stdout = sys.stdout if self.stdout is None else self.stdout
+        stdout.write(text)
+        stdout.flush()
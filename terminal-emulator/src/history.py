@@ -0,0 +1,255 @@
+import array
+import bisect
+import contextlib
+import fcntl
+import mmap
+import os
+import threading
+import time
+import typing
+
+
+BATCH_SIZE = 64  # Сколько команд копится в памяти перед записью на диск
+FLUSH_INTERVAL = 5.0  # Пачка старше стольких секунд пишется при следующей команде
+OFFSET_TYPE: typing.Final = "Q"  # Смещение начала команды в журнале: 8 байт в порядке байтов машины
+OFFSET_SIZE = array.array(OFFSET_TYPE).itemsize
+
+
+def write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+class History:
+    """История команд в двух файлах, которые только дописываются
+
+    PATH - журнал: команды в UTF-8, каждая заканчивается переводом строки
+    (строки продолжения склеиваются до записи, поэтому команда - одна строка).
+    PATH.idx - индекс: смещение начала каждой команды в журнале, 8 байт на команду.
+
+    Открытие не читает историю: число команд - это размер индекса, делённый на 8,
+    а оба файла отображаются в память. Проверяется только хвост журнала после
+    последней проиндексированной команды: он мог остаться от оборванной записи.
+
+    Новые команды копятся в памяти и пишутся пачкой из BATCH_SIZE команд (или
+    старше FLUSH_INTERVAL секунд) одним write в журнал и одним в индекс под flock,
+    поэтому запись не добавляет командам заметной задержки, а несколько оболочек
+    могут писать в одну историю. Несохранённые команды видны поиску этой оболочки.
+    """
+
+    def __init__(self):
+        self.path: str | None = None
+        self.pending: list[str] = []
+        self.pending_since = 0.0
+        self.log_fd: int | None = None
+        self.index_fd: int | None = None
+        self.log_map: mmap.mmap | None = None
+        self.index_map: mmap.mmap | None = None
+        self.offsets: typing.Sequence[int] = ()
+        self.indexed_end = 0  # Конец последней проиндексированной команды в журнале
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def configure(self, path: str) -> None:
+        """Задаёт файл истории; файлы открываются при первом обращении"""
+        self.path = path
+
+    def add(self, command: str) -> None:
+        """Запоминает команду; на диск она попадёт со следующей пачкой"""
+        if self.path is None or not command:
+            return
+        with self.lock:
+            if not self.pending:
+                self.pending_since = time.monotonic()
+            self.pending.append(command)
+            if len(self.pending) >= BATCH_SIZE or time.monotonic() - self.pending_since >= FLUSH_INTERVAL:
+                self.flush_locked()
+
+    def flush(self) -> None:
+        with self.lock:
+            self.flush_locked()
+
+    def __len__(self) -> int:
+        with self.lock:
+            self.open_locked()
+            return len(self.offsets) + len(self.pending)
+
+    def entries(self, start: int = 0) -> list[tuple[int, str]]:
+        """Команды с номерами (с 1), начиная с команды номер start + 1"""
+        with self.lock:
+            self.open_locked()
+            count = len(self.offsets)
+            entries = [(index + 1, self.entry(index)) for index in range(max(start, 0), count)]
+            entries += list(enumerate(self.pending, count + 1))[max(start - count, 0):]
+        return entries
+
+    def search(self, text: str, prefix: bool = False) -> list[tuple[int, str]]:
+        """Команды с номерами, содержащие text, или начинающиеся с него при prefix=True"""
+        if not text:
+            return self.entries()
+        with self.lock:
+            self.open_locked()
+            matched = [(index + 1, self.entry(index)) for index in self.search_log(text.encode(), prefix)]
+            matched += [
+                (number, command)
+                for number, command in enumerate(self.pending, len(self.offsets) + 1)
+                if (command.startswith(text) if prefix else text in command)
+            ]
+        return matched
+
+    def search_log(self, needle: bytes, prefix: bool) -> list[int]:
+        """Индексы команд журнала, в которых есть needle
+
+        Подстрока ищется mmap.find по всему журналу без декодирования команд,
+        команда совпадения определяется двоичным поиском по индексу, после чего
+        поиск продолжается со следующей команды. Начало команды при prefix=True -
+        это начало файла или позиция после перевода строки.
+        """
+        log_map, offsets, end = self.log_map, self.offsets, self.indexed_end
+        if log_map is None or not offsets:
+            return []
+        found = []
+        if prefix:
+            if log_map[:len(needle)] == needle:
+                found.append(0)
+            needle = b"\n" + needle
+        pos = log_map.find(needle, 0, end)
+        while pos != -1:
+            index = bisect.bisect_right(offsets, pos + prefix) - 1
+            found.append(index)
+            next_start = offsets[index + 1] if index + 1 < len(offsets) else end
+            pos = log_map.find(needle, next_start - prefix, end)
+        return found
+
+    def close(self) -> None:
+        """Сохраняет несохранённые команды и закрывает файлы"""
+        with self.lock:
+            self.flush_locked()
+            self.unmap()
+            for fd in (self.log_fd, self.index_fd):
+                if fd is not None:
+                    os.close(fd)
+            self.log_fd = self.index_fd = None
+
+    def entry(self, index: int) -> str:
+        log_map = typing.cast(mmap.mmap, self.log_map)
+        start = self.offsets[index]
+        return log_map[start:log_map.find(b"\n", start)].decode(errors="replace")
+
+    def flush_locked(self) -> None:
+        if not self.pending:
+            return
+        self.open_locked()
+        log_fd, index_fd = typing.cast(int, self.log_fd), typing.cast(int, self.index_fd)
+        lines = [f"{command}\n".encode() for command in self.pending]
+        with self.file_lock():
+            # Другая оболочка могла оборвать запись, новая пачка не должна приклеиться к её хвосту
+            self.repair()
+            offsets, pos = array.array(OFFSET_TYPE), os.fstat(log_fd).st_size
+            for line in lines:
+                offsets.append(pos)
+                pos += len(line)
+            # Сначала журнал, потом индекс: индекс никогда не ссылается на недописанную команду
+            write_all(log_fd, b"".join(lines))
+            write_all(index_fd, offsets.tobytes())
+        self.pending.clear()
+
+    def open_locked(self) -> None:
+        """Открывает файлы при первом обращении и подхватывает команды, дописанные другими оболочками"""
+        if self.path is None:
+            raise ValueError("history is not configured")
+        if self.log_fd is None:
+            flags = os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_CLOEXEC
+            self.log_fd = os.open(self.path, flags, 0o600)
+            self.index_fd = os.open(f"{self.path}.idx", flags, 0o600)
+            with self.file_lock():
+                self.repair()
+        self.remap()
+
+    @contextlib.contextmanager
+    def file_lock(self) -> typing.Iterator[None]:
+        fd = typing.cast(int, self.log_fd)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def read_offset(self, index: int) -> int:
+        data = os.pread(typing.cast(int, self.index_fd), OFFSET_SIZE, index * OFFSET_SIZE)
+        return array.array(OFFSET_TYPE, data)[0]
+
+    def repair(self) -> None:
+        """Приводит журнал и индекс в соответствие после оборванной записи
+
+        Читается только хвост журнала после последней проиндексированной команды:
+        команды в нём без индекса дописываются в индекс, недописанная команда
+        без перевода строки отрезается. Вызывается под flock.
+        """
+        log_fd, index_fd = typing.cast(int, self.log_fd), typing.cast(int, self.index_fd)
+        log_size = os.fstat(log_fd).st_size
+        index_size = os.fstat(index_fd).st_size
+        count = index_size // OFFSET_SIZE
+        while count and self.read_offset(count - 1) >= log_size:
+            count -= 1
+        if count * OFFSET_SIZE != index_size:
+            os.truncate(index_fd, count * OFFSET_SIZE)
+
+        tail_start = 0
+        if count:
+            last = self.read_offset(count - 1)
+            last_line = os.pread(log_fd, log_size - last, last)
+            if (newline := last_line.find(b"\n")) == -1:
+                # Последняя проиндексированная команда оборвана: индекс на неё не должен ссылаться
+                count -= 1
+                os.truncate(index_fd, count * OFFSET_SIZE)
+                tail_start = last
+            else:
+                tail_start = last + newline + 1
+        if tail_start == log_size:
+            return
+
+        tail = os.pread(log_fd, log_size - tail_start, tail_start)
+        complete = tail.rfind(b"\n") + 1
+        if complete < len(tail):
+            os.truncate(log_fd, tail_start + complete)
+        offsets, pos = array.array(OFFSET_TYPE), tail_start
+        for line in tail[:complete].splitlines(keepends=True):
+            offsets.append(pos)
+            pos += len(line)
+        write_all(index_fd, offsets.tobytes())
+
+    def remap(self) -> None:
+        """Отображает файлы в память заново, если они выросли
+
+        Индекс отображается раньше журнала: журнал дописывается первым, поэтому
+        он покрывает все команды отображённого индекса.
+        """
+        index_size = os.fstat(typing.cast(int, self.index_fd)).st_size // OFFSET_SIZE * OFFSET_SIZE
+        if self.index_map is not None and len(self.index_map) == index_size:
+            return
+        self.unmap()
+        if index_size == 0:
+            self.indexed_end = 0
+            return
+        self.index_map = mmap.mmap(typing.cast(int, self.index_fd), index_size, prot=mmap.PROT_READ)
+        self.log_map = mmap.mmap(typing.cast(int, self.log_fd), 0, prot=mmap.PROT_READ)
+        self.offsets = memoryview(self.index_map).cast(OFFSET_TYPE)
+        self.indexed_end = self.log_map.find(b"\n", self.offsets[-1]) + 1
+
+    def unmap(self) -> None:
+        if isinstance(self.offsets, memoryview):
+            self.offsets.release()
+        self.offsets = ()
+        for mapping in (self.index_map, self.log_map):
+            if mapping is not None:
+                mapping.close()
+        self.index_map = self.log_map = None
+
+
+# Общая для IO, AsyncFrontend и встроенной команды history история
+history = History()
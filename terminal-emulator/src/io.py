@@ -1,8 +1,15 @@
 import abc
+import functools
+import io
 import re
+import sys
+import typing
 
 import src.context as context_lib
 import src.executor as executor_lib
+import src.history as history_lib
+import src.jobs as jobs_lib
+import src.metrics as metrics
 import src.models as models
 
 
@@ -12,23 +19,48 @@ class IOProtocol(abc.ABC):
         ...
 
 
+DEFAULT_PARSE_CACHE_SIZE = 1024
+
+# Выражения компилируются один раз при импорте модуля, а не в каждом экземпляре IO
+PARAM_PATTERN = re.compile(r'--?(?P<key>[a-zA-Z_]+[a-zA-Z0-9_]*)=?')
+# Все конструкции языка в одном выражении, порядок альтернатив задаёт их приоритет
+LEXER_PATTERN = re.compile(
+    r"""(?P<quoted>'(?:[^']|\\')*[^\\]'|"(?:[^"]|\\")*[^\\]")"""
+    r"|(?P<assignment>[a-zA-Z_]+[a-zA-Z0-9_]*=[^\s|&<>]+)"
+    r"|(?P<flag>--?[a-zA-Z_]+[a-zA-Z0-9_]*=?)"
+    r"|(?P<pipe>\|)"
+    r"|(?P<background>&)"
+    r"|(?P<redirect>>>|[<>])"
+    r"|(?P<word>[^\s|&<>]+)"
+)
+TOKEN_KINDS = {kind.value: kind for kind in models.TokenKind}
+DEFINITION_PATTERN = re.compile(r"(?P<key>[a-zA-Z_]+[a-zA-Z0-9_]*)=(?P<value>[^\s]+)")
+
+
 class IO(IOProtocol):
-    def __init__(self, context: context_lib.ContextProtocol, executor: executor_lib.ExecutorProtocol):
+    def __init__(
+        self,
+        context: context_lib.ContextProtocol,
+        executor: executor_lib.ExecutorProtocol,
+        parse_cache_size: int = DEFAULT_PARSE_CACHE_SIZE,
+        jobs: jobs_lib.JobController | None = None,
+        trace: metrics.TraceSink | None = None,
+        parse_cached: typing.Callable[[str], models.ParsedLine] | None = None,
+    ):
         self.context = context
         self.executor = executor
+        self.jobs = jobs if jobs is not None else jobs_lib.controller
+        self.trace = trace
+        # LRU-кеш разобранных строк: повторяющиеся команды не разбираются заново.
+        # Разбор не зависит от переменных, поэтому кеш можно разделить между несколькими IO
+        if parse_cached is None:
+            parse_cached = functools.lru_cache(maxsize=parse_cache_size)(self.parse_line)
+        self.parse_cached = parse_cached
 
-        self.single_quotes_pattern = re.compile(r"'([^']|\\')+[^\\]'")
-        self.double_quotes_pattern = re.compile(r'"([^"]|\\")+[^\\]"')
-        self.param_pattern = re.compile(r'--?(?P<key>[a-zA-Z_]+[a-zA-Z0-9_]*)=?')
-        self.token_pattern = re.compile(r'[^\s]+')
-        self.pattern_pipeline = [
-            self.single_quotes_pattern,
-            self.double_quotes_pattern,
-            self.param_pattern,
-            self.token_pattern,
-        ]
-
-        self.defenition_matcher = re.compile(r"(?P<key>[a-zA-Z_]+[a-zA-Z0-9_]*)=(?P<value>[^\s]+)")
+        self.param_pattern = PARAM_PATTERN
+        self.lexer_pattern = LEXER_PATTERN
+        self.token_kinds = TOKEN_KINDS
+        self.defenition_matcher = DEFINITION_PATTERN
 
     def read_command(self) -> str:
         """Читает строки из stdin, пока строки заканчиваются на \\"""
@@ -43,33 +75,28 @@ class IO(IOProtocol):
                 continue
             return command
     
-    def tokenize(self, patterns: list[re.Pattern], command) -> list[str]:
+    def tokenize(self, command: str) -> list[models.Token]:
         """
-        Разделяет строку на токены рекурсивно запуская регулярные выражения
+        Разделяет строку на типизированные токены за один проход
 
-        Порядок выражений задаёт приоритет различных конструкций языка при парсинге
+        Каждая позиция строки просматривается один раз, поэтому время
+        разбора линейно зависит от длины команды
         """
-        pattern, *next_patterns = patterns
-        def recurse(s: str) -> list[str]:
-            if next_patterns:
-                return self.tokenize(next_patterns, s)
-            else:
-                return []
-        tail: str = command
-        tokens = []
-        while tail:
-            m = pattern.search(tail)
-            if m:
-                start, end = m.span()
-                tokens.extend(recurse(tail[:start]))
-                tokens.append(m.group())
-                tail = tail[end:]
-            else:
-                tokens.extend(recurse(tail))
-                tail = ""
-        return tokens
+        kinds = self.token_kinds
+        return [
+            models.Token(m.group(), kinds[typing.cast(str, m.lastgroup)])
+            for m in self.lexer_pattern.finditer(command)
+        ]
+
+    def token_kind(self, token: str) -> models.TokenKind:
+        """Тип токена; для строк без типа он определяется тем же лексером"""
+        if isinstance(token, models.Token):
+            return token.kind
+        if (m := self.lexer_pattern.fullmatch(token)) and m.lastgroup:
+            return self.token_kinds[m.lastgroup]
+        return models.TokenKind.WORD
 
-    def consume_defenitions(self, tokens: list[str]) -> tuple[dict[str, str], list[str]]:
+    def consume_defenitions(self, tokens: typing.Sequence[str]) -> tuple[dict[str, str], list[str]]:
         """Забрать из начала списка определения"""
         env = {}
         for index, token in enumerate(tokens):
@@ -77,31 +104,58 @@ class IO(IOProtocol):
                 groupdict = m.groupdict()
                 env[groupdict["key"]] = groupdict["value"]
             else:
-                return env, tokens[index:]
+                return env, list(tokens[index:])
         return env, []
             
-    def consume_command(self, tokens: list[str]) -> tuple[models.Command, list[str]]:
-        """Забрать из начала списка токенов комманду, потребяет все токены до "|" или до конца строки"""
-        if "|" in tokens:
-            pos = tokens.index("|")
-            tail = tokens[pos+1:]
-            tokens = tokens[:pos]
-        else:
-            tail = []
+    def consume_command(self, tokens: typing.Sequence[str]) -> tuple[models.Command, list[str]]:
+        """Забрать из начала списка токенов комманду, потребяет все токены до "|" или до конца строки
+
+        Перенаправления < file, > file и >> file сохраняются в полях команды, а не в аргументах
+        """
+        command, end = self.consume_command_at(tokens, 0)
+        return command, list(tokens[end:])
+
+    def consume_command_at(self, tokens: typing.Sequence[str], start: int) -> tuple[models.Command, int]:
+        """Разобрать комманду, начинающуюся с позиции start, вернуть её и позицию следующей комманды
 
+        Токены не копируются, поэтому разбор всей строки линеен по числу токенов
+        """
         command = models.Command()
-        command.name, *tokens = tokens
-
-        while tokens:
-            head, *tokens = tokens
-            if (m := self.param_pattern.match(head)) and tokens and not self.param_pattern.match(tokens[0]):
-                key = m.groupdict()["key"]
-                value, *tokens = tokens
-                command.kwargs[key] = value
+        command.name = tokens[start]
+
+        index, end = start + 1, len(tokens)
+        while index < end:
+            head = tokens[index]
+            head_kind = self.token_kind(head)
+            if head_kind == models.TokenKind.PIPE:
+                return command, index + 1
+            if (
+                head_kind == models.TokenKind.REDIRECT
+                and index + 1 < end
+                and self.token_kind(tokens[index + 1]) not in (models.TokenKind.PIPE, models.TokenKind.REDIRECT)
+            ):
+                # Последнее перенаправление каждого направления побеждает, как в bash
+                if head == "<":
+                    command.stdin = tokens[index + 1]
+                else:
+                    command.stdout, command.append = tokens[index + 1], head == ">>"
+                index += 2
+                continue
+            if (
+                head_kind == models.TokenKind.FLAG
+                and index + 1 < end
+                and self.token_kind(tokens[index + 1]) not in (
+                    models.TokenKind.FLAG, models.TokenKind.PIPE, models.TokenKind.REDIRECT
+                )
+                and (m := self.param_pattern.match(head))
+            ):
+                command.kwargs[m.groupdict()["key"]] = tokens[index + 1]
+                index += 2
             else:
                 command.args.append(head)
-        
-        return command, tail
+                index += 1
+
+        return command, end
 
 
     def populate(self, value: str) -> str:
@@ -113,28 +167,136 @@ class IO(IOProtocol):
         return self.context.populate_values(value)
 
 
-    def parse_command(self) -> bool:
-        """Считывает команду из stdin, парсит её превращая в Command и запускает Executor"""
-        raw_command = self.read_command()
-    
-        tokens = self.tokenize(self.pattern_pipeline, raw_command)
-        env, tokens = self.consume_defenitions(tokens)
-        for k, v in env.items():
-            if tokens:
-                self.context.add_scoped_param(k, v)
-            else:
-                self.context.add_unscoped_param(k, v)
-        
+    def parse_line(self, raw_command: str) -> models.ParsedLine:
+        """Разбирает строку на определения переменных и шаблоны команд без подстановки значений
+
+        & в конце строки означает запуск конвейера в фоне, time в начале - вывод метрик после выполнения
+        """
+        line_tokens = self.tokenize(raw_command)
+        background = bool(line_tokens) and line_tokens[-1].kind == models.TokenKind.BACKGROUND
+        if background:
+            line_tokens.pop()
+        timed = len(line_tokens) > 1 and line_tokens[0] == "time" and line_tokens[0].kind == models.TokenKind.WORD
+        definitions, tokens = self.consume_defenitions(line_tokens[1:] if timed else line_tokens)
+
         commands = []
-        while tokens:
-            command, tokens = self.consume_command(tokens)
-            command.args = [self.populate(value) for value in command.args]
-            command.kwargs = {key: self.populate(value) for key, value in command.kwargs.items()}
+        position = 0
+        while position < len(tokens):
+            command, position = self.consume_command_at(tokens, position)
             commands.append(command)
-        
-        if commands:
-            self.executor.execute_pipeline(self.context.get_env(), commands)
 
-        self.context.exit_scope()
-        
+        return models.ParsedLine(definitions, commands, background, timed)
+
+    def parse_cache_info(self) -> functools._CacheInfo:
+        """Статистика кеша разбора: попадания, промахи, размер"""
+        return typing.cast(functools._lru_cache_wrapper, self.parse_cached).cache_info()
+
+    def expand(self, template: models.Command) -> models.Command:
+        """Создаёт готовую к запуску команду из шаблона, подставляя значения переменных"""
+        command = models.Command()
+        command.name = template.name
+        command.args = [self.populate(value) for value in template.args]
+        command.kwargs = {key: self.populate(value) for key, value in template.kwargs.items()}
+        if template.stdin is not None:
+            command.stdin = self.populate(template.stdin)
+        if template.stdout is not None:
+            command.stdout = self.populate(template.stdout)
+        command.append = template.append
+        return command
+
+    def execute_command(
+        self,
+        raw_command: str,
+        stdout: typing.IO[str] | None = None,
+        stderr: typing.IO[str] | None = None,
+        stdin: typing.IO[str] | None = None,
+    ) -> models.Status | None:
+        """Парсит строку команды, превращая её в Command, и запускает Executor
+
+        Вывод команды и сообщения оболочки пишутся в stdout и stderr (по умолчанию sys.stdout и sys.stderr).
+        stdin - вход первой встроенной стадии конвейера переднего плана (по умолчанию sys.stdin).
+        Возвращает статус выполнения или None, если в строке были только определения
+        """
+        stderr = sys.stderr if stderr is None else stderr
+        parsed = self.parse_cached(raw_command)
+        # Переменные, заданные перед командой, живут в своей области и убираются, даже если команда упала
+        self.context.push_scope()
+        try:
+            for k, v in parsed.definitions.items():
+                if parsed.commands:
+                    self.context.add_scoped_param(k, v)
+                else:
+                    self.context.add_unscoped_param(k, v)
+
+            # Подстановка выполняется на каждый запуск: значения переменных могли измениться
+            commands = [self.expand(template) for template in parsed.commands]
+
+            status = None
+            # Метрики стадий собираются, только если их кто-то увидит
+            measure = parsed.timed or self.trace is not None
+            if commands and parsed.background:
+                env = self.context.get_env()
+
+                def run() -> models.Status:
+                    # Фоновая задача не читает ввод оболочки, метрики выводятся по её завершении
+                    status = self.executor.execute_pipeline(
+                        env, commands, stdin=io.StringIO(), measure=measure, stdout=stdout, stderr=stderr
+                    )
+                    return self.report(raw_command, parsed, status, stderr)
+
+                job = self.jobs.start(raw_command, run)
+                stderr.write(f"[{job.job_id}]\n")
+                status = jobs_lib.JobController.make_status(0)
+            elif commands:
+                status = self.executor.execute_pipeline(
+                    self.context.get_env(), commands, stdin=stdin, measure=measure, stdout=stdout, stderr=stderr
+                )
+                status = self.report(raw_command, parsed, status, stderr)
+        finally:
+            self.context.pop_scope()
+
+        return status
+
+    def report(
+        self,
+        raw_command: str,
+        parsed: models.ParsedLine,
+        status: models.Status,
+        stderr: typing.IO[str],
+    ) -> models.Status:
+        """Выводит метрики для префикса time в stderr и записывает команду в журнал, если он включён"""
+        if parsed.timed:
+            stderr.write(metrics.format_report(status))
+        if self.trace is not None:
+            self.trace.record(raw_command, status)
+        return status
+
+    def parse_command(self) -> bool:
+        """Считывает команду из stdin, парсит её превращая в Command и запускает Executor"""
+        command = self.read_command()
+        history_lib.history.add(command)
+        self.execute_command(command)
         return True
+
+    def run_script(self, lines: typing.Iterable[str]) -> int:
+        """Выполняет команды из потока строк без приглашения ко вводу
+
+        Строки, заканчивающиеся на \\, продолжаются на следующей строке, пустые
+        строки и комментарии (#) пропускаются. Возвращает код выхода последней команды.
+        """
+        code = 0
+        command = ""
+        for line in lines:
+            snippet = line.strip()
+            if snippet.endswith("\\"):
+                command += snippet[:-1]
+                continue
+            command += snippet
+            if command and not command.startswith("#"):
+                if (status := self.execute_command(command)) is not None:
+                    code = status.code
+            command = ""
+        if command and not command.startswith("#"):
+            if (status := self.execute_command(command)) is not None:
+                code = status.code
+        return code
@@ -0,0 +1,104 @@
+import threading
+import typing
+
+import src.exceptions as exceptions
+import src.models as models
+
+
+class Job:
+    """Конвейер, выполняющийся в фоне в отдельном потоке"""
+
+    def __init__(self, job_id: int, command_line: str):
+        self.job_id = job_id
+        self.command_line = command_line
+        self.status: models.Status | None = None  # Заполняется по завершении
+        self.thread: threading.Thread | None = None
+
+    def is_running(self) -> bool:
+        return self.status is None
+
+    def wait(self) -> models.Status:
+        if self.thread is not None:
+            self.thread.join()
+        return typing.cast(models.Status, self.status)
+
+    def describe(self) -> str:
+        """Строка для вывода командой jobs"""
+        if self.status is None:
+            state = "Running"
+        elif self.status.code == 0:
+            state = "Done"
+        else:
+            state = f"Exit {self.status.code}"
+        return f"[{self.job_id}] {state:<10} {self.command_line}"
+
+
+class JobController:
+    """Таблица фоновых задач оболочки
+
+    Каждая задача выполняется в своём потоке. Внешние программы разных задач
+    работают параллельно на разных ядрах, встроенные команды - параллельно
+    с ожиданием ввода-вывода.
+    """
+
+    def __init__(self):
+        self.jobs: dict[int, Job] = {}
+        self.lock = threading.Lock()
+
+    def start(self, command_line: str, run: typing.Callable[[], models.Status]) -> Job:
+        """Запускает run в фоне и регистрирует задачу под наименьшим свободным номером
+
+        Поток создаётся до регистрации, а запускается после неё: задача в таблице
+        всегда с потоком, и wait из другого потока не вернётся раньше времени.
+        """
+        job = Job(0, command_line)
+
+        def target():
+            # Необработанная ошибка будет выведена потоком, задача завершится с кодом -1
+            status = JobController.make_status(-1)
+            try:
+                status = run()
+            except exceptions.ExitException:
+                # exit в фоновой задаче завершает только её
+                status = JobController.make_status(0)
+            finally:
+                job.status = status
+
+        # Поток-демон не мешает оболочке завершиться, пока задача работает
+        thread = job.thread = threading.Thread(target=target, daemon=True)
+        with self.lock:
+            job_id = 1
+            while job_id in self.jobs:
+                job_id += 1
+            job.job_id = job_id
+            thread.name = f"job-{job_id}"
+            self.jobs[job_id] = job
+        thread.start()
+        return job
+
+    def get(self, job_id: int | None = None) -> Job | None:
+        """Возвращает задачу по номеру или последнюю запущенную"""
+        with self.lock:
+            if job_id is None:
+                return self.jobs[max(self.jobs)] if self.jobs else None
+            return self.jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        with self.lock:
+            return [self.jobs[job_id] for job_id in sorted(self.jobs)]
+
+    def forget(self, job: Job) -> None:
+        """Удаляет завершённую задачу из таблицы после того, как о ней сообщили"""
+        with self.lock:
+            if self.jobs.get(job.job_id) is job and not job.is_running():
+                del self.jobs[job.job_id]
+
+    @staticmethod
+    def make_status(code: int) -> models.Status:
+        status = models.Status()
+        status.index, status.code = 0, code
+        return status
+
+
+# Общая для IO и встроенных команд jobs/wait/fg таблица задач
+controller = JobController()
@@ -1,15 +1,114 @@
+import argparse
+import io as io_module
+import os
+import sys
+
 import src.context as context_lib
 import src.exceptions as exceptions_lib
 import src.executor as executor_lib
+import src.history as history_lib
 import src.io as io_lib
+import src.metrics as metrics_lib
+import src.registry as registry_lib
+import src.result_cache as result_cache_lib
+import src.spawn as spawn_lib
+
+
+SCRIPT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_HISTORY_FILE = "~/.terminal_emulator_history"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Command-line interface")
+    parser.add_argument("script", nargs="?", help="файл с командами; без него команды читаются из stdin")
+    parser.add_argument(
+        "--parse-cache-size", type=int, default=io_lib.DEFAULT_PARSE_CACHE_SIZE, help="число разобранных строк в кеше"
+    )
+    parser.add_argument(
+        "--spawn-backend", choices=sorted(spawn_lib.SPAWNERS), default="subprocess", help="способ запуска внешних программ"
+    )
+    parser.add_argument(
+        "--plugins", metavar="DIR", action="append", default=[], help="каталог с плагинами встроенных команд"
+    )
+    parser.add_argument(
+        "--server", metavar="SOCKET", help="принимать команды через Unix-сокет SOCKET вместо stdin"
+    )
+    parser.add_argument(
+        "--result-cache", metavar="MIB", type=int, help="кешировать результаты wc для файлов, не больше MIB мегабайт"
+    )
+    parser.add_argument(
+        "--result-cache-file", metavar="FILE", help="сохранять кеш результатов в FILE между запусками (включает кеш)"
+    )
+    parser.add_argument(
+        "--async-input", action="store_true", help="читать и разбирать следующие команды, пока выполняется текущая"
+    )
+    parser.add_argument(
+        "--history",
+        metavar="FILE",
+        default=os.environ.get("TERMINAL_HISTORY", DEFAULT_HISTORY_FILE),
+        help="файл истории команд, введённых в терминале; пустая строка отключает историю",
+    )
+    parser.add_argument("--trace", metavar="FILE", help="дописывать метрики каждой команды в FILE в формате JSON Lines")
+    args = parser.parse_args()
+    if isinstance(sys.stdout, io_module.TextIOWrapper):
+        # Встроенные команды выводят байты, не являющиеся UTF-8, как surrogateescape: в терминал они попадают как есть
+        sys.stdout.reconfigure(errors="surrogateescape")
+
+    for plugin_dir in args.plugins:
+        registry_lib.registry.load_plugin_dir(plugin_dir)
+
+    if args.result_cache is not None or args.result_cache_file is not None:
+        budget = result_cache_lib.DEFAULT_MEMORY_BUDGET if args.result_cache is None else args.result_cache * 1024 * 1024
+        result_cache_lib.result_cache.configure(budget, args.result_cache_file)
+
+    if args.history:
+        history_lib.history.configure(os.path.expanduser(args.history))
+
+    context = context_lib.Context()
+    executor = executor_lib.Executor(spawn_lib.SPAWNERS[args.spawn_backend]())
+    trace = metrics_lib.TraceSink(args.trace) if args.trace is not None else None
+    io = io_lib.IO(context, executor, parse_cache_size=args.parse_cache_size, trace=trace)
+
+    code = 0
+    try:
+        if args.server is not None:
+            # Модуль сервера нужен только в этом режиме и не замедляет обычный запуск
+            import src.server as server_lib
+
+            with server_lib.ShellServer(args.server, executor, args.parse_cache_size, trace) as server:
+                try:
+                    server.serve_forever()
+                except KeyboardInterrupt:
+                    pass
+        elif args.script is not None:
+            with open(args.script, buffering=SCRIPT_BUFFER_SIZE) as script:
+                code = io.run_script(script)
+        elif args.async_input:
+            # asyncio заметно замедляет запуск, поэтому импортируется только в этом режиме
+            import asyncio
+
+            import src.frontend as frontend_lib
+
+            code = asyncio.run(frontend_lib.AsyncFrontend(io).run())
+        elif not sys.stdin.isatty():
+            # Команды приходят из pipe-а или файла: без приглашения и построчного input()
+            code = io.run_script(sys.stdin)
+        else:
+            while io.parse_command():
+                pass
+    except exceptions_lib.ExitException:
+        print("Quitting...")
+    finally:
+        if trace is not None:
+            trace.close()
+        if history_lib.history.enabled:
+            history_lib.history.close()
+        if result_cache_lib.result_cache.enabled:
+            result_cache_lib.result_cache.save()
 
+    return code if 0 <= code <= 255 else 1
 
-context = context_lib.Context()
-executor = executor_lib.Executor()
-io = io_lib.IO(context, executor)
 
-try:
-    while io.parse_command():
-        pass
-except exceptions_lib.ExitException:
-    print("Quitting...")
\ No newline at end of file
+# Защита нужна и для дочерних процессов multiprocessing, которые импортируют этот модуль
+if __name__ == "__main__":
+    sys.exit(main())
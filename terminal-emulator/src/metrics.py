@@ -0,0 +1,132 @@
+import contextlib
+import resource
+import threading
+import time
+import typing
+
+import src.models as models
+
+
+# Ресурсы текущего потока доступны только в Linux, иначе учитывается весь процесс
+RUSAGE_THREAD = getattr(resource, "RUSAGE_THREAD", resource.RUSAGE_SELF)
+
+
+def read_io_counters(path: str, count_own_read: bool = False) -> tuple[int, int]:
+    """Возвращает rchar и wchar из файла /proc/.../io или (0, 0), если он недоступен
+
+    Счётчики учитывают все байты, прошедшие через read/write/sendfile, включая pipe-ы.
+    Файл показывает значения до собственного чтения; count_own_read добавляет его к rchar,
+    чтобы разность двух замеров одного потока не включала сами замеры.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        lines = data.split(b"\n", 2)
+        return int(lines[0].split()[1]) + (len(data) if count_own_read else 0), int(lines[1].split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0, 0
+
+
+def process_io_counters(pid: int) -> tuple[int, int]:
+    return read_io_counters(f"/proc/{pid}/io")
+
+
+def thread_io_counters(count_own_read: bool = False) -> tuple[int, int]:
+    return read_io_counters(f"/proc/self/task/{threading.get_native_id()}/io", count_own_read)
+
+
+@contextlib.contextmanager
+def measure_thread(stage: models.StageMetrics) -> typing.Generator[models.StageMetrics, None, None]:
+    """Заполняет метрики встроенной команды, выполняющейся в текущем потоке оболочки
+
+    Процессы, запущенные самой командой (например, параллельный wc), и вывод,
+    оставшийся в буфере sys.stdout, не учитываются.
+    """
+    start = time.perf_counter()
+    usage = resource.getrusage(RUSAGE_THREAD)
+    bytes_in, bytes_out = thread_io_counters(count_own_read=True)
+    try:
+        yield stage
+    finally:
+        end_usage = resource.getrusage(RUSAGE_THREAD)
+        end_bytes_in, end_bytes_out = thread_io_counters()
+        stage.wall_time = time.perf_counter() - start
+        stage.user_time = end_usage.ru_utime - usage.ru_utime
+        stage.sys_time = end_usage.ru_stime - usage.ru_stime
+        stage.bytes_in = end_bytes_in - bytes_in
+        stage.bytes_out = end_bytes_out - bytes_out
+        stage.max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def record_process(
+    stage: models.StageMetrics,
+    start: float,
+    rusage: resource.struct_rusage | None,
+    io_counters: tuple[int, int],
+) -> None:
+    """Заполняет метрики внешней программы по данным, полученным при её ожидании
+
+    Время отсчитывается до момента, когда оболочка дождалась процесса.
+    """
+    stage.wall_time = time.perf_counter() - start
+    if rusage is not None:
+        stage.user_time, stage.sys_time, stage.max_rss = rusage.ru_utime, rusage.ru_stime, rusage.ru_maxrss
+    stage.bytes_in, stage.bytes_out = io_counters
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size} {unit}"
+        size //= 1024
+    return f"{size} GiB"
+
+
+def format_report(status: models.Status) -> str:
+    """Отчёт для префикса time: итог по конвейеру и строка на каждую стадию"""
+    user_time = sum(stage.user_time for stage in status.stages)
+    sys_time = sum(stage.sys_time for stage in status.stages)
+    lines = [f"real {status.wall_time:.3f}s  user {user_time:.3f}s  sys {sys_time:.3f}s"]
+    for index, stage in enumerate(status.stages):
+        kind = "builtin" if stage.builtin else "external"
+        lines.append(
+            f"[{index}] {stage.name} ({kind}): real {stage.wall_time:.3f}s"
+            f" user {stage.user_time:.3f}s sys {stage.sys_time:.3f}s"
+            f" in {format_size(stage.bytes_in)} out {format_size(stage.bytes_out)}"
+            f" max rss {stage.max_rss} KiB"
+        )
+    return "\n".join(lines) + "\n"
+
+
+class TraceSink:
+    """Журнал выполненных команд в формате JSON Lines для разбора медленных скриптов
+
+    Каждая строка файла - одна команда с кодом возврата и метриками стадий.
+    Запись потокобезопасна: фоновые задачи пишут в журнал по завершении.
+    """
+
+    def __init__(self, path: str):
+        # Построчная буферизация: запись не теряется, если оболочка завершится аварийно
+        self.file = open(path, "a", encoding="utf-8", buffering=1)
+        self.lock = threading.Lock()
+
+    def record(self, command_line: str, status: models.Status) -> None:
+        import json
+
+        line = json.dumps(
+            {
+                "timestamp": time.time(),
+                "command": command_line,
+                "code": status.code,
+                "index": status.index,
+                "wall_time": status.wall_time,
+                "stages": [vars(stage) for stage in status.stages],
+            },
+            ensure_ascii=False,
+        )
+        with self.lock:
+            self.file.write(line + "\n")
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
@@ -1,16 +1,110 @@
+import enum
+
+
+class TokenKind(enum.Enum):
+    WORD = "word"
+    QUOTED = "quoted"
+    ASSIGNMENT = "assignment"
+    FLAG = "flag"
+    PIPE = "pipe"
+    BACKGROUND = "background"
+    REDIRECT = "redirect"
+
+
+class Token(str):
+    """Токен команды: сама строка и её тип, определённый лексером"""
+    kind: TokenKind
+
+    def __new__(cls, value: str, kind: TokenKind = TokenKind.WORD) -> "Token":
+        token = super().__new__(cls, value)
+        token.kind = kind
+        return token
+
+
 class Command:
     def __init__(self):
         self.args = []
         self.kwargs = {}
+        self.stdin = None
+        self.stdout = None
+        self.append = False
 
     name: str
     args: list[str]
     kwargs: dict[str, str]
+    stdin: str | None  # Файл, из которого читает команда (< file)
+    stdout: str | None  # Файл, в который пишет команда (> file или >> file)
+    append: bool  # Вывод дописывается в конец файла (>>), а не заменяет его
+
+    def has_redirects(self) -> bool:
+        return self.stdin is not None or self.stdout is not None
+
+
+def make_command(name: str, *args: str, **kwargs: str) -> Command:
+    """Собирает команду из имени и аргументов без разбора строки, например в тестах и бенчмарках"""
+    command = Command()
+    command.name = name
+    command.args = list(args)
+    command.kwargs = dict(kwargs)
+    return command
+
+
+class ParsedLine:
+    """Разобранная строка команды до подстановки переменных
+
+    Объекты переиспользуются кешем разбора и не должны изменяться.
+    """
+    def __init__(
+        self,
+        definitions: dict[str, str],
+        commands: list[Command],
+        background: bool = False,
+        timed: bool = False,
+    ):
+        self.definitions = definitions
+        self.commands = commands
+        self.background = background
+        self.timed = timed
+
+    definitions: dict[str, str]  # Определения переменных в начале строки
+    commands: list[Command]  # Шаблоны команд конвейера
+    background: bool  # Строка заканчивается на &, конвейер запускается в фоне
+    timed: bool  # Строка начинается с time, после выполнения выводятся метрики стадий
+
+
+class StageMetrics:
+    """Время и ресурсы, потраченные одной стадией конвейера"""
+    def __init__(self, name: str, builtin: bool):
+        self.name = name
+        self.builtin = builtin
+        self.wall_time = 0.0
+        self.user_time = 0.0
+        self.sys_time = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.max_rss = 0
+
+    name: str
+    builtin: bool  # Встроенная команда (поток оболочки) или внешняя программа
+    wall_time: float  # Секунды от запуска стадии до её завершения
+    user_time: float  # Процессорное время в пространстве пользователя, секунды
+    sys_time: float  # Процессорное время в ядре, секунды
+    bytes_in: int  # Байт прочитано системными вызовами
+    bytes_out: int  # Байт записано системными вызовами
+    # Пиковый размер резидентной памяти в KiB. Для встроенных команд - всей оболочки, для внешних
+    # Linux учитывает и память оболочки до exec, поэтому значение не меньше её размера
+    max_rss: int
 
 
 class Status:
+    def __init__(self):
+        self.wall_time = 0.0
+        self.stages = []
+
     code: int  # Return code of last command or first command that failed
     index: int  # Index of command which return code is written above
+    wall_time: float  # Время выполнения всего конвейера, секунды
+    stages: list[StageMetrics]  # Метрики стадий в порядке команд, пусто для фоновых задач
 
 
 class ProcessResult:
@@ -0,0 +1,57 @@
+import os
+import threading
+
+
+class PathCache:
+    """Кеш путей к внешним программам, аналог таблицы команды hash в bash
+
+    Пути ищутся в PATH один раз и запоминаются под ключом (имя, значение PATH),
+    поэтому фоновые задачи и сессии сервера с разными PATH не сбрасывают записи
+    друг друга. Отсутствующие программы не запоминаются, чтобы установленная
+    позже программа нашлась без сброса кеша. Кеш общий для потоков, изменения
+    выполняются под блокировкой.
+    """
+
+    def __init__(self):
+        self.entries: dict[tuple[str, str | None], str] = {}
+        self.hits: dict[tuple[str, str | None], int] = {}
+        self.lock = threading.Lock()
+
+    def resolve(self, name: str, path_value: str | None, count_hit: bool = True) -> str | None:
+        """Возвращает путь к программе name или None, если её нет в path_value
+
+        count_hit=False позволяет найти путь, не считая это запуском программы.
+        """
+        # shutil нужен только внешним программам, при старте оболочки он не загружается
+        import shutil
+
+        if os.path.dirname(name):
+            # Явный путь в PATH не ищется и не кешируется
+            return shutil.which(name)
+        key = (name, path_value)
+        with self.lock:
+            path = self.entries.get(key)
+        if path is None:
+            # Обход PATH выполняется без блокировки, чтобы не задерживать другие потоки
+            path = shutil.which(name, path=os.defpath if path_value is None else path_value)
+            if path is None:
+                return None
+        with self.lock:
+            self.entries.setdefault(key, path)
+            self.hits[key] = self.hits.get(key, 0) + count_hit
+        return path
+
+    def forget(self, name: str, path_value: str | None) -> None:
+        """Удаляет устаревшую запись, например, если программу удалили"""
+        with self.lock:
+            self.entries.pop((name, path_value), None)
+            self.hits.pop((name, path_value), None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.hits.clear()
+
+
+# Общий для исполнителя и встроенной команды hash кеш
+path_cache = PathCache()
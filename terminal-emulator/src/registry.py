@@ -0,0 +1,101 @@
+import importlib
+import importlib.util
+import os
+import typing
+
+import src.builtins as builtins
+import src.models as models
+
+
+Handler = typing.Callable[..., models.ProcessResult]
+ENTRY_POINT_GROUP = "terminal_emulator.builtins"
+# Встроенные команды из отдельных модулей, импортируются при первом запуске
+LAZY_BUILTINS = {
+    name: f"src.text_builtins:TextBuiltin.{name}" for name in ("grep", "head", "tail", "sort", "uniq")
+}
+
+
+def load_target(target: str) -> Handler:
+    """Импортирует обработчик по строке "module:attr" или "path/to/file.py:attr", attr может быть составным"""
+    module_name, _, attr = target.rpartition(":")
+    if module_name.endswith(".py"):
+        name = f"terminal_emulator_plugin_{os.path.splitext(os.path.basename(module_name))[0]}"
+        spec = importlib.util.spec_from_file_location(name, module_name)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"cannot load plugin {module_name}")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_name)
+    handler = module
+    for part in attr.split("."):
+        handler = getattr(handler, part)
+    return typing.cast(Handler, handler)
+
+
+class CommandRegistry:
+    """Таблица встроенных команд: имя команды -> обработчик
+
+    Поиск команды - одно обращение к словарю. Кроме методов Builtin, команды
+    можно добавить из плагинов: модулей, каталога с файлами или entry points
+    группы terminal_emulator.builtins. Модуль плагина импортируется только при
+    первом запуске его команды, поэтому плагины не замедляют старт оболочки.
+    """
+
+    def __init__(self):
+        self.handlers: dict[str, Handler] = {}
+        self.lazy: dict[str, str] = {}  # Имя команды -> ещё не импортированный "module:attr"
+        self.entry_points_loaded = False
+
+    @classmethod
+    def from_builtins(cls) -> "CommandRegistry":
+        """Реестр со всеми встроенными командами; служебные атрибуты Builtin командами не считаются"""
+        registry = cls()
+        for name, value in vars(builtins.Builtin).items():
+            if isinstance(value, staticmethod) and not name.startswith("_"):
+                registry.register(name, getattr(builtins.Builtin, name))
+        for name, target in LAZY_BUILTINS.items():
+            registry.register_lazy(name, target)
+        return registry
+
+    def register(self, name: str, handler: Handler) -> None:
+        self.lazy.pop(name, None)
+        self.handlers[name] = handler
+
+    def register_lazy(self, name: str, target: str) -> None:
+        """Регистрирует команду, обработчик которой импортируется из target при первом запуске"""
+        self.handlers.pop(name, None)
+        self.lazy[name] = target
+
+    def load_plugin_dir(self, path: str) -> None:
+        """Регистрирует плагины из каталога: файл name.py содержит команду name - функцию с тем же именем"""
+        for filename in sorted(os.listdir(path)):
+            name, ext = os.path.splitext(filename)
+            if ext == ".py" and not name.startswith("_"):
+                self.register_lazy(name, f"{os.path.join(path, filename)}:{name}")
+
+    def load_entry_points(self) -> None:
+        """Регистрирует команды из entry points установленных пакетов, не импортируя их"""
+        self.entry_points_loaded = True
+        import importlib.metadata
+
+        for entry_point in importlib.metadata.entry_points(group=ENTRY_POINT_GROUP):
+            if entry_point.name not in self.handlers:
+                self.lazy.setdefault(entry_point.name, entry_point.value)
+
+    def get(self, name: str) -> Handler | None:
+        """Обработчик команды name или None, если это внешняя программа"""
+        if (handler := self.handlers.get(name)) is not None:
+            return handler
+        if not self.entry_points_loaded:
+            # Установленные пакеты просматриваются один раз, при первой неизвестной команде
+            self.load_entry_points()
+        if (target := self.lazy.get(name)) is None:
+            return None
+        handler = load_target(target)
+        self.register(name, handler)
+        return handler
+
+
+# Общий для исполнителя и main.py реестр команд
+registry = CommandRegistry.from_builtins()
@@ -0,0 +1,171 @@
+import collections
+import os
+import stat
+import sys
+import threading
+import typing
+
+
+DEFAULT_MEMORY_BUDGET = 16 * 1024 * 1024
+TAIL_CHECK_SIZE = 4096  # Сколько последних байт старого содержимого сверяется перед дочитыванием хвоста
+ENTRY_OVERHEAD = 512  # Примерный размер записи без пути и результата, байт
+
+Key = tuple[str, tuple[str, ...], str]
+
+
+class Entry:
+    """Результат команды для одной версии файла"""
+    def __init__(
+        self, dev: int, ino: int, size: int, mtime_ns: int, tail_digest: str, value: tuple[typing.Any, ...]
+    ):
+        self.dev = dev
+        self.ino = ino
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.tail_digest = tail_digest
+        self.value = value
+
+    dev: int
+    ino: int
+    size: int
+    mtime_ns: int
+    tail_digest: str  # Хеш последних TAIL_CHECK_SIZE байт файла на момент подсчёта
+    value: tuple[typing.Any, ...]  # Результат команды для этого файла
+
+    def matches(self, st: os.stat_result) -> bool:
+        return (self.dev, self.ino, self.size, self.mtime_ns) == (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def tail_digest(filename: str, size: int) -> str:
+    """Хеш последних TAIL_CHECK_SIZE байт из первых size байт файла"""
+    import hashlib
+
+    start = max(0, size - TAIL_CHECK_SIZE)
+    with open(filename, "rb", buffering=0) as f:
+        f.seek(start)
+        data = f.read(size - start)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """Кеш результатов детерминированных встроенных команд для обычных файлов
+
+    Ключ записи - команда, её аргументы и путь к файлу; запись действительна,
+    пока у файла те же устройство, inode, размер и mtime_ns. Если файл только
+    дописывали, lookup сообщает об этом, и команда может досчитать лишь новый
+    хвост. Записи вытесняются по LRU, когда их примерный размер превышает
+    memory_budget. Кеш выключен, пока его не включит configure.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.memory_budget = DEFAULT_MEMORY_BUDGET
+        self.persist_path: str | None = None
+        self.entries: collections.OrderedDict[Key, Entry] = collections.OrderedDict()
+        self.sizes: dict[Key, int] = {}
+        self.memory_used = 0
+        self.stats = {"hit": 0, "append": 0, "miss": 0, "uncached": 0}  # Число поисков каждого вида
+        # Встроенные команды могут выполняться одновременно в фоновых задачах и сессиях сервера
+        self.lock = threading.Lock()
+
+    def configure(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, persist_path: str | None = None) -> None:
+        """Включает кеш; если задан persist_path, загружает из него записи прошлых сессий"""
+        self.enabled = True
+        self.memory_budget = memory_budget
+        self.persist_path = persist_path
+        if persist_path is not None:
+            self.load(persist_path)
+
+    def lookup(self, command: str, args: tuple[str, ...], filename: str) -> tuple[str, Entry | None, os.stat_result]:
+        """Ищет результат command для файла filename
+
+        Возвращает вид попадания, запись и stat файла на момент поиска:
+        "hit" - запись действительна, "append" - файл дописан после подсчёта и
+        запись описывает его первые entry.size байт, "miss" - записи нет или она
+        устарела, "uncached" - файл не обычный и не кешируется.
+        :raises OSError: если файл недоступен
+        """
+        st = os.stat(filename)
+        if not stat.S_ISREG(st.st_mode):
+            with self.lock:
+                self.stats["uncached"] += 1
+            return "uncached", None, st
+        key = (command, args, os.path.abspath(filename))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        if entry is not None and entry.matches(st):
+            kind = "hit"
+        elif (
+            entry is not None
+            and (entry.dev, entry.ino) == (st.st_dev, st.st_ino)
+            and st.st_size > entry.size
+            and tail_digest(filename, entry.size) == entry.tail_digest
+        ):
+            kind = "append"
+        else:
+            kind, entry = "miss", None
+        with self.lock:
+            self.stats[kind] += 1
+        return kind, entry, st
+
+    def store(
+        self, command: str, args: tuple[str, ...], filename: str, st: os.stat_result, value: tuple[typing.Any, ...]
+    ) -> None:
+        """Запоминает результат command для версии файла, описанной st"""
+        key = (command, args, os.path.abspath(filename))
+        entry = Entry(st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, tail_digest(filename, st.st_size), value)
+        with self.lock:
+            self.put(key, entry)
+
+    def put(self, key: Key, entry: Entry) -> None:
+        self.memory_used -= self.sizes.pop(key, 0)
+        size = ENTRY_OVERHEAD + sys.getsizeof(key[2]) + sum(map(sys.getsizeof, entry.value))
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        self.sizes[key] = size
+        self.memory_used += size
+        while self.memory_used > self.memory_budget and self.entries:
+            old_key, _ = self.entries.popitem(last=False)
+            self.memory_used -= self.sizes.pop(old_key)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.memory_used = 0
+            self.stats = dict.fromkeys(self.stats, 0)
+
+    def load(self, path: str) -> None:
+        """Загружает записи из файла; повреждённый или отсутствующий файл даёт пустой кеш"""
+        import json
+
+        try:
+            with open(path) as f:
+                records = json.load(f)
+            with self.lock:
+                for command, args, filename, dev, ino, size, mtime_ns, digest, value in records:
+                    self.put((command, tuple(args), filename), Entry(dev, ino, size, mtime_ns, digest, tuple(value)))
+        except (OSError, ValueError, TypeError):
+            self.clear()
+
+    def save(self) -> None:
+        """Сохраняет записи в persist_path, заменяя файл целиком, чтобы не оставить его недописанным"""
+        if self.persist_path is None:
+            return
+        import json
+
+        with self.lock:
+            records = [
+                [command, list(args), filename, e.dev, e.ino, e.size, e.mtime_ns, e.tail_digest, list(e.value)]
+                for (command, args, filename), e in self.entries.items()
+            ]
+        tmp_path = f"{self.persist_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(records, f)
+        os.replace(tmp_path, self.persist_path)
+
+
+# Общий для встроенных команд и main.py кеш
+result_cache = ResultCache()
@@ -0,0 +1,179 @@
+import io
+import os
+import socket
+import socketserver
+import stat
+import struct
+import typing
+
+import src.context as context_lib
+import src.exceptions as exceptions
+import src.executor as executor_lib
+import src.io as io_lib
+import src.metrics as metrics
+import src.models as models
+
+
+# Кадр запроса: длина и строка команды в UTF-8
+REQUEST_HEADER = struct.Struct("!I")
+# Кадр ответа: код, индекс команды, время конвейера, длины stdout и stderr, затем их байты
+RESPONSE_HEADER = struct.Struct("!iidII")
+MAX_REQUEST_SIZE = 1024 * 1024
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytes | None:
+    """Читает ровно size байт или возвращает None, если соединение закрыто раньше"""
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+class Response:
+    """Результат выполнения одной строки на сервере"""
+    def __init__(self, code: int, index: int, wall_time: float, stdout: str, stderr: str):
+        self.code = code
+        self.index = index
+        self.wall_time = wall_time
+        self.stdout = stdout
+        self.stderr = stderr
+
+    code: int  # Код возврата как в models.Status, 0 для строки из одних определений
+    index: int  # Индекс команды, чей код записан в code, -1 если команд не было
+    wall_time: float  # Время выполнения конвейера на сервере, секунды
+    stdout: str
+    stderr: str
+
+    def encode(self) -> bytes:
+        # Байты вывода, не являющиеся UTF-8, передаются клиенту как есть
+        out, err = self.stdout.encode(errors="surrogateescape"), self.stderr.encode(errors="surrogateescape")
+        return RESPONSE_HEADER.pack(self.code, self.index, self.wall_time, len(out), len(err)) + out + err
+
+    @classmethod
+    def receive(cls, sock: socket.socket) -> "Response | None":
+        if (header := recv_exact(sock, RESPONSE_HEADER.size)) is None:
+            return None
+        code, index, wall_time, out_size, err_size = RESPONSE_HEADER.unpack(header)
+        if (body := recv_exact(sock, out_size + err_size)) is None:
+            return None
+        return cls(
+            code,
+            index,
+            wall_time,
+            body[:out_size].decode(errors="replace"),
+            body[out_size:].decode(errors="replace"),
+        )
+
+
+class SessionHandler(socketserver.BaseRequestHandler):
+    """Сессия одного клиента: свой Context, общие с остальными сессиями Executor и кеш разбора
+
+    Context сессии - дочерний к общему контексту сервера: переменные сервера
+    видны в сессии без копирования, а переменные сессии не видны другим.
+
+    Сессия завершается, когда клиент закрывает соединение или выполняет exit.
+    """
+    server: "ShellServer"
+
+    def handle(self) -> None:
+        shell = io_lib.IO(
+            self.server.context.child(),
+            self.server.executor,
+            trace=self.server.trace,
+            parse_cached=self.server.parse_cached,
+        )
+        while (header := recv_exact(self.request, REQUEST_HEADER.size)) is not None:
+            (size,) = REQUEST_HEADER.unpack(header)
+            if size > MAX_REQUEST_SIZE or (payload := recv_exact(self.request, size)) is None:
+                return
+            response, finished = self.execute(shell, payload.decode(errors="replace"))
+            self.request.sendall(response.encode())
+            if finished:
+                return
+
+    def execute(self, shell: io_lib.IO, command_line: str) -> tuple[Response, bool]:
+        """Выполняет строку в сессии, возвращает ответ и признак завершения сессии"""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        if shell.parse_cached(command_line).background:
+            # Вывод фоновой задачи некуда доставить после отправки ответа
+            return Response(2, -1, 0.0, "", "background jobs are not supported in server mode\n"), False
+
+        status: models.Status | None = None
+        finished = False
+        try:
+            # stdin сервера не принадлежит ни одной сессии: встроенная команда в начале конвейера получает пустой вход
+            status = shell.execute_command(command_line, stdout=stdout, stderr=stderr, stdin=io.StringIO())
+        except exceptions.ExitException:
+            finished = True
+        except Exception as e:
+            # Ошибка одной команды не должна завершать сервер и другие сессии
+            stderr.write(f"{type(e).__name__}: {e}\n")
+            status = executor_lib.Executor.make_status(-1, 1)
+        if status is None:
+            return Response(0, -1, 0.0, stdout.getvalue(), stderr.getvalue()), finished
+        return Response(status.code, status.index, status.wall_time, stdout.getvalue(), stderr.getvalue()), finished
+
+
+class ShellServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Долгоживущая оболочка, принимающая строки команд через Unix-сокет
+
+    Каждая сессия обслуживается своим потоком. Интерпретатор, модули и кеши
+    (разбор строк, пути к программам, плагины) прогреваются один раз и
+    переиспользуются всеми сессиями. Сокет доступен только его владельцу.
+    """
+    daemon_threads = True
+
+    def __init__(
+        self,
+        path: str,
+        executor: executor_lib.ExecutorProtocol,
+        parse_cache_size: int = io_lib.DEFAULT_PARSE_CACHE_SIZE,
+        trace: metrics.TraceSink | None = None,
+    ):
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            # Сокет остался от предыдущего запуска
+            os.unlink(path)
+        super().__init__(path, SessionHandler)
+        os.chmod(path, 0o600)
+        self.executor = executor
+        self.trace = trace
+        # Общие для всех сессий переменные
+        self.context = context_lib.Context()
+        self.parse_cached = io_lib.IO(
+            context_lib.Context(), executor, parse_cache_size=parse_cache_size
+        ).parse_cached
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.server_address):  # type: ignore[arg-type]
+            os.unlink(self.server_address)  # type: ignore[arg-type]
+
+
+class Client:
+    """Клиент сервера: одна сессия со своими переменными"""
+
+    def __init__(self, path: str):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+
+    def execute(self, command_line: str) -> Response:
+        """Выполняет строку на сервере
+        :raises ConnectionError: если сервер закрыл сессию
+        """
+        payload = command_line.encode()
+        self.sock.sendall(REQUEST_HEADER.pack(len(payload)) + payload)
+        if (response := Response.receive(self.sock)) is None:
+            raise ConnectionError("server closed the session")
+        return response
+
+    def close(self) -> None:
+        self.sock.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.close()
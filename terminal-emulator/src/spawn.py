@@ -0,0 +1,164 @@
+import abc
+import os
+import resource
+import signal
+import typing
+
+import src.metrics as metrics
+
+if typing.TYPE_CHECKING:
+    import subprocess
+
+
+class ProcessProtocol(typing.Protocol):
+    pid: int
+    rusage: resource.struct_rusage | None  # Ресурсы процесса и его потомков, заполняются в wait(measure=True)
+    io_counters: tuple[int, int]  # Прочитано и записано байт, заполняются в wait(measure=True)
+
+    def wait(self, measure: bool = False) -> int:
+        ...
+
+
+class SpawnerProtocol(abc.ABC):
+    @abc.abstractmethod
+    def spawn(
+        self,
+        executable: str,
+        argv: list[str],
+        env: typing.Mapping[str, str],
+        stdin: int | None,
+        stdout: int,
+        stderr: int,
+    ) -> ProcessProtocol:
+        """Запускает программу executable (полный путь) с заданными дескрипторами stdin/stdout/stderr
+
+        stdin=None означает пустой вход (/dev/null).
+        :raises FileNotFoundError: если программы по пути executable нет
+        """
+        ...
+
+
+def reap(pid: int, measure: bool = False) -> tuple[int, resource.struct_rusage | None, tuple[int, int]]:
+    """Дожидается завершения процесса и возвращает код выхода, ресурсы и счётчики ввода-вывода
+
+    Счётчики читаются из /proc, пока завершившийся процесс ещё не убран (WNOWAIT).
+    Без measure процесс просто убирается через waitpid, ресурсы и счётчики не собираются.
+    """
+    if not measure:
+        _, wait_status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(wait_status), None, (0, 0)
+    io_counters = (0, 0)
+    if hasattr(os, "waitid"):
+        os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+        io_counters = metrics.process_io_counters(pid)
+    _, wait_status, rusage = os.wait4(pid, 0)
+    return os.waitstatus_to_exitcode(wait_status), rusage, io_counters
+
+
+class PopenProcess:
+    """Процесс subprocess.Popen, ожидаемый через os.wait4 ради учёта ресурсов"""
+
+    def __init__(self, popen: "subprocess.Popen"):
+        self.popen = popen
+        self.pid = popen.pid
+        self.rusage: resource.struct_rusage | None = None
+        self.io_counters = (0, 0)
+
+    def wait(self, measure: bool = False) -> int:
+        if self.popen.returncode is None:
+            # Popen не должен сам ждать уже убранный процесс
+            self.popen.returncode, self.rusage, self.io_counters = reap(self.pid, measure)
+        return self.popen.returncode
+
+
+class SubprocessSpawner(SpawnerProtocol):
+    """Запуск через subprocess.Popen
+
+    Модуль subprocess импортируется при первом запуске внешней программы,
+    а не при старте оболочки.
+    """
+
+    def spawn(
+        self,
+        executable: str,
+        argv: list[str],
+        env: typing.Mapping[str, str],
+        stdin: int | None,
+        stdout: int,
+        stderr: int,
+    ) -> ProcessProtocol:
+        import subprocess
+
+        return PopenProcess(
+            subprocess.Popen(
+                argv,
+                executable=executable,
+                env=env,
+                stdin=subprocess.DEVNULL if stdin is None else stdin,
+                stdout=stdout,
+                stderr=stderr,
+            )
+        )
+
+
+class SpawnedProcess:
+    """Процесс, запущенный через os.posix_spawn"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.returncode: int | None = None
+        self.rusage: resource.struct_rusage | None = None
+        self.io_counters = (0, 0)
+
+    def wait(self, measure: bool = False) -> int:
+        if self.returncode is None:
+            self.returncode, self.rusage, self.io_counters = reap(self.pid, measure)
+        return self.returncode
+
+
+class PosixSpawnSpawner(SpawnerProtocol):
+    """Запуск через os.posix_spawn
+
+    libc создаёт процесс через vfork/clone(CLONE_VM), не копируя таблицы
+    страниц родителя, поэтому стоимость запуска не растёт вместе с памятью
+    интерпретатора. Дескрипторы pipe-ов в Python создаются с O_CLOEXEC,
+    поэтому в программу попадают только stdin/stdout/stderr.
+    """
+
+    # Python игнорирует SIGPIPE, а игнорирование наследуется через exec
+    DEFAULT_SIGNALS = tuple(
+        getattr(signal, name) for name in ("SIGPIPE", "SIGXFSZ") if hasattr(signal, name)
+    )
+
+    def spawn(
+        self,
+        executable: str,
+        argv: list[str],
+        env: typing.Mapping[str, str],
+        stdin: int | None,
+        stdout: int,
+        stderr: int,
+    ) -> ProcessProtocol:
+        stdin_action = (
+            (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0)
+            if stdin is None
+            else (os.POSIX_SPAWN_DUP2, stdin, 0)
+        )
+        pid = os.posix_spawn(
+            executable,
+            argv,
+            env,
+            file_actions=[
+                stdin_action,
+                (os.POSIX_SPAWN_DUP2, stdout, 1),
+                (os.POSIX_SPAWN_DUP2, stderr, 2),
+            ],
+            setsigdef=self.DEFAULT_SIGNALS,
+        )
+        return SpawnedProcess(pid)
+
+
+SPAWNERS: dict[str, type[SpawnerProtocol]] = {
+    "subprocess": SubprocessSpawner,
+    "posix_spawn": PosixSpawnSpawner,
+}
@@ -0,0 +1,367 @@
+import collections
+import contextlib
+import io
+import itertools
+import re
+import sys
+import typing
+
+import src.builtins as builtins
+import src.exceptions as exceptions
+import src.models as models
+
+
+BLOCK_SIZE = 1024 * 1024  # Сколько символов grep читает за раз
+SORT_MEMORY_LIMIT = 64 * 1024 * 1024  # Сколько байт строк sort сортирует в памяти до сброса во временный файл
+NUMBER_PATTERN = re.compile(r"\s*([-+]?\d*\.?\d+)")
+
+
+def parse_options(
+    args: typing.Sequence[str],
+    kwargs: typing.Mapping[str, str],
+    flags: str,
+    valued: typing.Mapping[str, str],
+) -> tuple[set[str], dict[str, str], list[str]]:
+    """Разбирает аргументы команды на флаги, флаги со значением и операнды
+
+    IO считает значением флага следующий за ним токен, поэтому для флагов без
+    значения (grep -i foo) этот токен на самом деле операнд. Флаги, как принято
+    в POSIX, должны стоять перед операндами. valued отображает имена флагов со
+    значением (в том числе длинные, например regexp) на однобуквенные.
+    :raises exceptions.UsageError: если флаг не поддерживается
+    """
+    options: set[str] = set()
+    values: dict[str, str] = {}
+    operands: list[str] = []
+
+    def add_flags(key: str) -> None:
+        unknown = [flag for flag in key if flag not in flags]
+        if unknown:
+            raise exceptions.UsageError(f"invalid option -- '{unknown[0]}'")
+        options.update(key)
+
+    for key, value in kwargs.items():
+        if key in valued:
+            values[valued[key]] = value
+        else:
+            add_flags(key)
+            if value:
+                operands.append(value)
+    index = 0
+    while index < len(args):
+        arg = args[index]
+        if len(arg) > 1 and arg.startswith("-") and arg.lstrip("-").isalpha():
+            if (key := arg.lstrip("-")) in valued:
+                if index + 1 == len(args):
+                    raise exceptions.UsageError(f"option requires an argument -- '{key}'")
+                values[valued[key]] = args[index + 1]
+                index += 1
+            else:
+                add_flags(key)
+        else:
+            operands.append(arg)
+        index += 1
+    return options, values, operands
+
+
+def parse_count(values: typing.Mapping[str, str], operands: list[str], default: int = 10) -> tuple[int, bool]:
+    """Число строк для head и tail из -n N, --lines N или -N; второе значение - форма +N
+
+    :raises exceptions.UsageError: если число некорректно
+    """
+    value = values.get("n")
+    if value is None and operands and operands[0][:1] == "-" and operands[0][1:].isdigit():
+        value = operands.pop(0)[1:]
+    if value is None:
+        return default, False
+    from_start = value.startswith("+")
+    if not value.lstrip("+").isdigit():
+        raise exceptions.UsageError(f"invalid number of lines: '{value}'")
+    return int(value.lstrip("+")), from_start
+
+
+def iter_inputs(in_io: io.TextIOBase, filenames: typing.Sequence[str]) -> typing.Iterator[tuple[str, typing.IO[str]]]:
+    """Открывает входы команды по очереди: файлы из аргументов или входной поток, если их нет"""
+    if not filenames:
+        if in_io is not sys.stdin and isinstance(in_io, io.TextIOWrapper):
+            # Недекодируемые байты от предыдущей стадии не должны ронять оболочку и выводятся как есть
+            in_io.reconfigure(errors="surrogateescape")
+        yield "(standard input)", typing.cast(typing.IO[str], in_io)
+        return
+    for filename in filenames:
+        with open(filename, encoding="utf-8", errors="surrogateescape") as f:
+            yield filename, f
+
+
+def iter_lines(in_io: io.TextIOBase, filenames: typing.Sequence[str]) -> typing.Iterator[str]:
+    for _, stream in iter_inputs(in_io, filenames):
+        yield from stream
+
+
+def iter_blocks(stream: typing.IO[str]) -> typing.Iterator[str]:
+    """Читает поток блоками из целых строк, каждый блок заканчивается переводом строки"""
+    while block := stream.read(BLOCK_SIZE):
+        builtins.check_cancelled()
+        if not block.endswith("\n"):
+            block += stream.readline()
+            if not block.endswith("\n"):
+                block += "\n"
+        yield block
+
+
+def matched_lines(block: str, pattern: re.Pattern[str]) -> typing.Iterator[tuple[int, int]]:
+    """Границы строк блока, в которых найден шаблон
+
+    Шаблон ищется по всему блоку сразу, а не в каждой строке отдельно, поэтому
+    строки без совпадений не стоят ни одного вызова из Python. Совпадение,
+    захватившее перевод строки, перепроверяется в пределах своей строки.
+    Пустое совпадение после последнего перевода строки (например, ^$) строкой не считается.
+    """
+    size = len(block)
+    pos = 0
+    while pos < size and (m := pattern.search(block, pos)) is not None and m.start() < size:
+        newline = block.rfind("\n", pos, m.start())
+        start = newline + 1 if newline >= 0 else pos
+        end = block.find("\n", m.start()) + 1 or size
+        if m.end() < end or pattern.search(block, start, end - 1) is not None:
+            yield start, end
+        pos = end
+
+
+def inverted_lines(spans: typing.Iterable[tuple[int, int]], size: int) -> typing.Iterator[tuple[int, int]]:
+    """Границы участков блока размера size между строками spans, то есть строк без совпадений"""
+    pos = 0
+    for start, end in spans:
+        if start > pos:
+            yield pos, start
+        pos = end
+    if pos < size:
+        yield pos, size
+
+
+def with_newline(line: str) -> str:
+    return line if line.endswith("\n") else line + "\n"
+
+
+def numeric_value(line: str) -> float:
+    """Число в начале строки, 0 если его нет"""
+    m = NUMBER_PATTERN.match(line)
+    return float(m.group(1)) if m else 0.0
+
+
+def numeric_key(line: str) -> tuple[float, str]:
+    """Ключ sort -n: число в начале строки, при равенстве - вся строка"""
+    return numeric_value(line), line
+
+
+class TextBuiltin:
+    """Встроенные версии частых текстовых утилит
+
+    Выполняются в потоке оболочки, поэтому стадии конвейера не нужны fork/exec
+    и pipe-ы до процесса. Данные обрабатываются построчно по мере поступления.
+    Реестр команд импортирует модуль только при первом запуске одной из них.
+
+    Команды:
+    - grep: строки, подходящие под регулярное выражение Python
+    - head: первые строки входа
+    - tail: последние строки входа
+    - sort: сортировка строк, большие входы сортируются слиянием через временные файлы
+    - uniq: удаление повторяющихся соседних строк
+    """
+
+    @staticmethod
+    def grep(in_io: io.TextIOBase, out_io: io.TextIOBase, *args, **kwargs) -> models.ProcessResult:
+        """Выводит строки входного потока или файлов, в которых найден шаблон.
+
+        Шаблон - регулярное выражение Python (по синтаксису близко к grep -E).
+        Поддерживаются флаги -i, -v, -c, -n, -F и -e/--regexp ШАБЛОН.
+
+        :param in_io: входной поток, если файлы не переданы
+        :param out_io: выходной поток для найденных строк
+        :param args: шаблон и имена файлов
+        :return: 0 если найдена хотя бы одна строка, 1 если нет
+        :raises exceptions.UsageError: при неизвестном флаге или некорректном шаблоне
+        """
+        options, values, operands = parse_options(args, kwargs, "ivcnF", {"e": "e", "regexp": "e"})
+        if "e" not in values:
+            if not operands:
+                raise exceptions.UsageError("no pattern given")
+            values["e"] = operands.pop(0)
+
+        source = re.escape(values["e"]) if "F" in options else values["e"]
+        try:
+            pattern = re.compile(source, re.MULTILINE | (re.IGNORECASE if "i" in options else 0))
+        except re.error as e:
+            raise exceptions.UsageError(f"invalid pattern: {e}") from e
+        invert = "v" in options
+        select = itertools.filterfalse if invert else filter
+        prefix_names = len(operands) > 1
+
+        found = False
+        for filename, stream in iter_inputs(in_io, operands):
+            prefix = f"{filename}:" if prefix_names else ""
+            count, number = 0, 1
+            # Если совпадений много, дешевле проверить каждую строку, чем искать по блоку
+            dense = False
+            for block in iter_blocks(stream):
+                total = block.count("\n")
+                if dense and "n" not in options:
+                    # Перевод строки в поиск не входит, иначе ^$ совпадёт в конце любой строки
+                    lines = list(select(lambda line: pattern.search(line, 0, len(line) - 1), io.StringIO(block)))
+                    matched = total - len(lines) if invert else len(lines)
+                    dense = matched * 8 > total
+                    found = found or bool(lines)
+                    count += len(lines)
+                    if "c" not in options:
+                        out_io.writelines(map(prefix.__add__, lines) if prefix else lines)
+                    continue
+
+                spans = list(matched_lines(block, pattern))
+                dense = len(spans) * 8 > total
+                if invert:
+                    spans = list(inverted_lines(spans, len(block)))
+                found = found or bool(spans)
+                # Номер строки в начале очередного участка считается от конца предыдущего
+                pos = 0
+                for start, end in spans:
+                    if "c" in options:
+                        count += block.count("\n", start, end)
+                    elif "n" in options:
+                        number += block.count("\n", pos, start)
+                        for line in io.StringIO(block[start:end]):
+                            out_io.write(f"{prefix}{number}:{line}")
+                            number += 1
+                        pos = end
+                    elif prefix:
+                        out_io.writelines(map(prefix.__add__, io.StringIO(block[start:end])))
+                    else:
+                        out_io.write(block[start:end])
+                number += block.count("\n", pos)
+            if "c" in options:
+                out_io.write(f"{prefix}{count}\n")
+
+        return models.ProcessResult(0 if found else 1)
+
+    @staticmethod
+    def head(in_io: io.TextIOBase, out_io: io.TextIOBase, *args, **kwargs) -> models.ProcessResult:
+        """Выводит первые N строк (по умолчанию 10) входного потока или файлов.
+
+        Чтение прекращается сразу после N-й строки, поэтому предыдущая стадия
+        конвейера получает EPIPE и тоже завершается, не дочитывая вход.
+
+        :param in_io: входной поток, если файлы не переданы
+        :param out_io: выходной поток
+        :param args: -N и имена файлов
+        :param kwargs: n или lines - число строк
+        """
+        _, values, operands = parse_options(args, kwargs, "", {"n": "n", "lines": "n"})
+        count, _ = parse_count(values, operands)
+        for _, stream in iter_inputs(in_io, operands):
+            out_io.writelines(itertools.islice(stream, count))
+
+        return models.ProcessResult(0)
+
+    @staticmethod
+    def tail(in_io: io.TextIOBase, out_io: io.TextIOBase, *args, **kwargs) -> models.ProcessResult:
+        """Выводит последние N строк (по умолчанию 10) входного потока или файлов.
+
+        В памяти хранятся только N последних строк в кольцевом буфере.
+        С -n +N выводит строки, начиная с N-й.
+
+        :param in_io: входной поток, если файлы не переданы
+        :param out_io: выходной поток
+        :param args: -N и имена файлов
+        :param kwargs: n или lines - число строк
+        """
+        _, values, operands = parse_options(args, kwargs, "", {"n": "n", "lines": "n"})
+        count, from_start = parse_count(values, operands)
+        for _, stream in iter_inputs(in_io, operands):
+            if from_start:
+                out_io.writelines(itertools.islice(stream, max(count - 1, 0), None))
+            else:
+                out_io.writelines(collections.deque(stream, maxlen=count))
+
+        return models.ProcessResult(0)
+
+    @staticmethod
+    def sort(in_io: io.TextIOBase, out_io: io.TextIOBase, *args, **kwargs) -> models.ProcessResult:
+        """Сортирует строки входного потока или файлов.
+
+        Строки сравниваются по кодам символов, как sort в локали C. Если строк
+        больше SORT_MEMORY_LIMIT байт, отсортированные части записываются во
+        временные файлы и сливаются, память не зависит от размера входа.
+        Поддерживаются флаги -r, -n, -u.
+
+        :param in_io: входной поток, если файлы не переданы
+        :param out_io: выходной поток
+        :param args: имена файлов
+        """
+        options, _, operands = parse_options(args, kwargs, "rnu", {})
+        key: typing.Callable[[str], typing.Any] | None = None
+        if "n" in options:
+            # С -u, как в GNU sort, равные числа не сравниваются дальше: устойчивая сортировка сохраняет порядок входа
+            key = numeric_value if "u" in options else numeric_key
+        reverse = "r" in options
+
+        with contextlib.ExitStack() as stack:
+            runs: list[typing.Iterable[str]] = []
+            chunk: list[str] = []
+            chunk_size = 0
+            for line in iter_lines(in_io, operands):
+                chunk.append(with_newline(line))
+                chunk_size += len(line)
+                if chunk_size >= SORT_MEMORY_LIMIT:
+                    runs.append(TextBuiltin.spill_run(stack, chunk, key, reverse))
+                    chunk, chunk_size = [], 0
+            chunk.sort(key=key, reverse=reverse)
+            if runs:
+                import heapq
+
+                runs.append(chunk)
+                lines: typing.Iterable[str] = heapq.merge(*runs, key=key, reverse=reverse)
+            else:
+                lines = chunk
+
+            if "u" in options:
+                # Из группы равных по ключу строк выводится первая; при -n это строки с равными числами
+                lines = (next(group) for _, group in itertools.groupby(lines, key=key))
+            out_io.writelines(lines)
+
+        return models.ProcessResult(0)
+
+    @staticmethod
+    def spill_run(
+        stack: contextlib.ExitStack,
+        chunk: list[str],
+        key: typing.Callable[[str], typing.Any] | None,
+        reverse: bool,
+    ) -> typing.IO[str]:
+        """Сортирует часть строк и записывает её во временный файл, возвращает файл для слияния"""
+        import tempfile
+
+        chunk.sort(key=key, reverse=reverse)
+        run = stack.enter_context(tempfile.TemporaryFile("w+", encoding="utf-8", errors="surrogateescape"))
+        run.writelines(chunk)
+        run.seek(0)
+        return run
+
+    @staticmethod
+    def uniq(in_io: io.TextIOBase, out_io: io.TextIOBase, *args, **kwargs) -> models.ProcessResult:
+        """Выводит строки входного потока или файла, схлопывая подряд идущие повторы.
+
+        Поддерживаются флаги -c (число повторов), -d (только повторяющиеся)
+        и -u (только уникальные).
+
+        :param in_io: входной поток, если файл не передан
+        :param out_io: выходной поток
+        :param args: имя файла
+        """
+        options, _, operands = parse_options(args, kwargs, "cdu", {})
+
+        for line, group in itertools.groupby(with_newline(line) for line in iter_lines(in_io, operands[:1])):
+            count = sum(1 for _ in group)
+            if ("d" in options and count == 1) or ("u" in options and count > 1):
+                continue
+            out_io.write(f"{count:7} {line}" if "c" in options else line)
+
+        return models.ProcessResult(0)
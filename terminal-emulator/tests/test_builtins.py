@@ -0,0 +1,112 @@
+import io
+
+import pytest
+
+import src.builtins as builtins
+
+
+@pytest.fixture()
+def small_chunks(monkeypatch):
+    # Маленькие порции, чтобы слова и строки пересекали их границы
+    monkeypatch.setattr(builtins, "CHUNK_SIZE", 3)
+    monkeypatch.setattr(builtins, "FILE_CHUNK_SIZE", 3)
+
+
+def test_wc_file():
+    out_io = io.StringIO()
+    builtins.Builtin.wc(None, out_io, "tests/example.txt")
+
+    assert out_io.getvalue() == "0 6 30 tests/example.txt\n"
+
+
+@pytest.mark.parametrize(
+    'text',
+    [
+        "roses are red\nviolets are blue\n",
+        "  leading and trailing  ",
+        "one\n\n\ntwo",
+        "привет мир\n",
+        "",
+    ]
+)
+def test_wc_chunk_boundaries(small_chunks, tmp_path, text):
+    path = tmp_path / "input.txt"
+    path.write_text(text)
+    expected = f"{text.count(chr(10))} {len(text.split())} {len(text.encode())}"
+
+    out_io = io.StringIO()
+    builtins.Builtin.wc(None, out_io, str(path))
+    assert out_io.getvalue() == f"{expected} {path}\n"
+
+    out_io = io.StringIO()
+    builtins.Builtin.wc(io.StringIO(text), out_io)
+    assert out_io.getvalue() == f"{expected}\n"
+
+
+def test_cat_binary_output(small_chunks, tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_text("привет\nмир\n")
+
+    raw = io.BytesIO()
+    out_io = io.TextIOWrapper(raw, encoding="utf-8")
+    builtins.Builtin.cat(None, out_io, str(path), str(path))
+    out_io.flush()
+
+    assert raw.getvalue().decode() == "привет\nмир\n" * 2 + "\n"
+
+
+def test_wc_parallel_keeps_order(tmp_path):
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"file{i}.txt"
+        path.write_text("word " * i + "\n" * i)
+        paths.append(str(path))
+
+    sequential, parallel = io.StringIO(), io.StringIO()
+    builtins.Builtin.wc(None, sequential, *paths, j="1")
+    builtins.Builtin.wc(None, parallel, *paths, j="3")
+
+    assert parallel.getvalue() == sequential.getvalue()
+    assert parallel.getvalue().splitlines()[-1] == "10 10 60 total"
+
+
+def test_cat_prefetches_next_file(tmp_path, monkeypatch):
+    prefetched = []
+    monkeypatch.setattr(builtins, "prefetch_file", prefetched.append)
+    paths = [str(tmp_path / name) for name in ("a", "b", "c")]
+    for path in paths:
+        with open(path, "w") as f:
+            f.write(path)
+
+    raw = io.BytesIO()
+    out_io = io.TextIOWrapper(raw, encoding="utf-8")
+    builtins.Builtin.cat(None, out_io, *paths)
+    out_io.flush()
+
+    assert prefetched == paths[1:]
+    assert raw.getvalue().decode() == "".join(paths) + "\n"
+
+
+@pytest.mark.parametrize("mode", ["w", "a"])
+def test_cat_to_file_descriptor(tmp_path, mode):
+    # В режиме "a" дескриптор открыт с O_APPEND, sendfile может откатиться на обычное копирование
+    source = tmp_path / "input.txt"
+    source.write_text("привет\n" * 10000)
+    target = tmp_path / "output.txt"
+    target.write_text("head\n")
+
+    with open(target, mode, encoding="utf-8") as out_io:
+        out_io.write("x\n")
+        builtins.Builtin.cat(None, out_io, str(source), str(source))
+
+    expected = "привет\n" * 20000 + "\n"
+    assert target.read_text() == ("head\n" if mode == "a" else "") + "x\n" + expected
+
+
+def test_cat_non_utf8_to_text_output(tmp_path):
+    path = tmp_path / "input.bin"
+    path.write_bytes(b"\xff\xfe text\n")
+
+    out_io = io.StringIO()
+    builtins.Builtin.cat(None, out_io, str(path))
+    assert out_io.getvalue().encode(errors="surrogateescape") == b"\xff\xfe text\n\n"
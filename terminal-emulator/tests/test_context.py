@@ -43,6 +43,9 @@ def test_exit_scope(ctx):
     [
         ("${x}${y}", "12"),
         ("cat ${x}", "cat 1"),
+        ("$x-$y", "1-2"),
+        ("${xy} $xy", "${xy} $xy"),
+        ("no references", "no references"),
     ]
 )
 def test_template(ctx, template, expected):
@@ -50,3 +53,75 @@ def test_template(ctx, template, expected):
     ctx.add_unscoped_param('y', '2')
 
     assert ctx.populate_values(template) == expected
+
+
+def test_template_after_change(ctx):
+    ctx.add_unscoped_param('x', '1')
+    assert ctx.populate_values("${x}") == "1"
+
+    ctx.add_scoped_param('x', '2')
+    assert ctx.populate_values("${x}") == "2"
+
+    ctx.exit_scope()
+    assert ctx.populate_values("${x}") == "1"
+
+
+def test_env_snapshot_reused_until_change(ctx):
+    ctx.add_unscoped_param('a', '1')
+    env = ctx.get_env()
+    version = ctx.version
+
+    ctx.exit_scope()
+    assert ctx.get_env() is env
+    assert ctx.version == version
+
+    ctx.add_scoped_param('b', '2')
+    assert ctx.get_env() is not env
+    assert ctx.version > version
+    assert env == {'a': '1'}
+
+
+def test_env_snapshot_is_read_only(ctx):
+    ctx.add_unscoped_param('a', '1')
+
+    with pytest.raises(TypeError):
+        ctx.get_env()['a'] = '2'  # type: ignore[index]
+
+
+def test_nested_scopes(ctx):
+    ctx.add_unscoped_param('a', '1')
+    ctx.push_scope()
+    ctx.add_scoped_param('a', '2')
+    ctx.push_scope()
+    ctx.add_scoped_param('b', '3')
+    assert ctx.get_env() == {'a': '2', 'b': '3'}
+
+    ctx.pop_scope()
+    assert ctx.get_env() == {'a': '2'}
+    ctx.pop_scope()
+    assert ctx.get_env() == {'a': '1'}
+    # Внешняя область видимости не удаляется, а очищается
+    ctx.add_scoped_param('c', '4')
+    ctx.pop_scope()
+    assert ctx.get_env() == {'a': '1'}
+
+
+def test_snapshot_not_affected_by_writes(ctx):
+    ctx.add_unscoped_param('a', '1')
+    ctx.add_scoped_param('b', '2')
+    env = ctx.get_env()
+
+    ctx.add_unscoped_param('a', '10')
+    ctx.add_scoped_param('c', '3')
+    assert env == {'a': '1', 'b': '2'}
+    assert ctx.get_env() == {'a': '10', 'b': '2', 'c': '3'}
+
+
+def test_child_context_is_isolated(ctx):
+    ctx.add_unscoped_param('a', '1')
+    child = ctx.child()
+    child.add_unscoped_param('b', '2')
+    ctx.add_unscoped_param('a', '3')
+
+    assert child.get_env() == {'a': '1', 'b': '2'}
+    assert ctx.get_env() == {'a': '3'}
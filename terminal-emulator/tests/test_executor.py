@@ -0,0 +1,147 @@
+import os
+import signal
+import threading
+import time
+import typing
+
+import pytest
+
+import src.executor as executor_lib
+import src.models as models
+import src.spawn as spawn
+
+
+ENV = {"PATH": os.environ.get("PATH", os.defpath)}
+
+
+@pytest.fixture(params=sorted(spawn.SPAWNERS))
+def executor(request):
+    yield executor_lib.Executor(spawn.SPAWNERS[request.param]())
+
+
+def test_builtin_pipeline(executor, capsys):
+    status = executor.execute_pipeline(ENV, [models.make_command("echo", "a b c"), models.make_command("wc")])
+
+    assert (status.index, status.code) == (1, 0)
+    assert capsys.readouterr().out == "1 3 6\n"
+
+
+def test_mixed_pipeline(executor, capsys):
+    status = executor.execute_pipeline(
+        ENV,
+        [models.make_command("echo", "roses are red"), models.make_command("tr", "a-z", "A-Z"), models.make_command("wc")],
+    )
+
+    assert (status.index, status.code) == (2, 0)
+    assert capsys.readouterr().out == "1 3 14\n"
+
+
+def test_stages_run_concurrently(executor, capsys):
+    # yes никогда не завершается сам, конвейер закончится только если head читает параллельно
+    status = executor.execute_pipeline(ENV, [models.make_command("yes"), models.make_command("head", "-n", "2")])
+
+    assert (status.index, status.code) == (1, 0)
+    assert capsys.readouterr().out == "y\ny\n"
+
+
+def test_first_failed_command(executor, capsys):
+    status = executor.execute_pipeline(ENV, [models.make_command("no-such-command"), models.make_command("wc")])
+
+    assert (status.index, status.code) == (0, -1)
+    assert "not found" in capsys.readouterr().err
+
+
+def test_relay_keeps_multibyte_characters(executor, capsys):
+    # Граница порции ретранслятора приходится на середину двухбайтового символа
+    text = "a" + "é" * 40000
+    status = executor.execute_pipeline(ENV, [models.make_command("echo", text), models.make_command("tr", "x", "y")])
+
+    assert status.code == 0
+    assert capsys.readouterr().out == text + "\n"
+
+
+def test_external_writes_to_real_fd(executor, capfd):
+    status = executor.execute_pipeline(ENV, [models.make_command("echo", "a b"), models.make_command("tr", "a-z", "A-Z")])
+
+    assert status.code == 0
+    assert capfd.readouterr().out == "A B\n"
+
+
+def test_missing_command_is_not_spawned(capsys):
+    class FailingSpawner(spawn.SubprocessSpawner):
+        def spawn(self, *args, **kwargs):
+            raise AssertionError("missing command must not be spawned")
+
+    executor = executor_lib.Executor(FailingSpawner())
+    status = executor.execute_pipeline(ENV, [models.make_command("no-such-command")])
+
+    assert (status.index, status.code) == (0, -1)
+
+
+@pytest.mark.parametrize("names", [["cat", "wc"], ["cat"]])
+def test_cancel_builtin_pipeline(names):
+    executor = executor_lib.Executor()
+    commands = [models.make_command(names[0], "/dev/zero"), *(models.make_command(name) for name in names[1:])]
+    statuses = []
+
+    with open(os.devnull, "w") as devnull:
+        thread = threading.Thread(
+            target=lambda: statuses.append(executor.execute_pipeline(ENV, commands, stdout=devnull))
+        )
+        thread.start()
+        deadline = time.monotonic() + 5
+        while thread.ident not in executor.cancelled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # Встроенные команды без внешних программ тоже прерываются, бесконечный вход не мешает
+        executor.cancel(typing.cast(int, thread.ident))
+        thread.join(5)
+
+    assert not thread.is_alive()
+    assert (statuses[0].index, statuses[0].code) == (0, -signal.SIGTERM)
+    assert executor.cancelled == {}
+
+
+def test_redirect_output_and_input(executor, tmp_path, capfd):
+    path = str(tmp_path / "out.txt")
+    stage = models.make_command("tr", "a-z", "A-Z")
+    stage.stdout = path
+    executor.execute_pipeline(ENV, [models.make_command("echo", "a b"), stage])
+    stage = models.make_command("echo", "c")
+    stage.stdout, stage.append = path, True
+    executor.execute_pipeline(ENV, [stage])
+
+    stage = models.make_command("wc")
+    stage.stdin = path
+    status = executor.execute_pipeline(ENV, [stage, models.make_command("cat")])
+
+    assert (status.index, status.code) == (1, 0)
+    assert capfd.readouterr().out == "2 3 6\n\n"
+    with open(path) as f:
+        assert f.read() == "A B\nc\n"
+
+
+def test_redirect_missing_file(executor, tmp_path, capsys):
+    stage = models.make_command("wc")
+    stage.stdin = str(tmp_path / "missing.txt")
+    status = executor.execute_pipeline(ENV, [stage])
+
+    assert (status.index, status.code) == (0, 1)
+    assert "No such file" in capsys.readouterr().err
+
+
+def test_non_utf8_bytes_pass_through_builtins(executor, tmp_path):
+    path = str(tmp_path / "out.bin")
+    data = b"\xff\xfe bad\nplain line\n\xc3 bad again\n"
+    source = tmp_path / "in.bin"
+    source.write_bytes(data)
+    stage = models.make_command("cat")
+    stage.stdout = path
+
+    status = executor.execute_pipeline(
+        ENV, [models.make_command("cat", str(source)), models.make_command("grep", "bad"), models.make_command("sort"), stage]
+    )
+
+    assert status.code == 0
+    with open(path, "rb") as f:
+        # Последний cat, как и всегда, дописывает перевод строки
+        assert f.read() == b"\xc3 bad again\n\xff\xfe bad\n\n"
@@ -0,0 +1,82 @@
+import asyncio
+import io
+import os
+import signal
+import threading
+import time
+
+import src.context as context_lib
+import src.executor as executor_lib
+import src.frontend as frontend_lib
+import src.io as io_lib
+
+
+def run_frontend(shell: io_lib.IO, read_fd: int) -> tuple[int, str]:
+    stdout = io.StringIO()
+    frontend = frontend_lib.AsyncFrontend(shell, stdin_fd=read_fd, interactive=False, stdout=stdout, stderr=stdout)
+    code = asyncio.run(frontend.run())
+    return code, stdout.getvalue()
+
+
+def test_runs_commands_in_order():
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b'x=5\necho "$x" \\\n more\n# comment\n\nfalse\n')
+    os.close(write_fd)
+    shell = io_lib.IO(context_lib.Context(), executor_lib.Executor())
+
+    code, output = run_frontend(shell, read_fd)
+    os.close(read_fd)
+    assert output == "5 more\n"
+    assert code == 1
+
+
+def test_parses_ahead_of_execution():
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"echo one\necho two\necho three\n")
+    os.close(write_fd)
+    parsed_during_first = []
+
+    class SlowExecutor(executor_lib.Executor):
+        def execute_pipeline(self, env, commands, stdin=None, measure=False, stdout=None, stderr=None):
+            if not parsed_during_first:
+                # Следующие строки разбираются в цикле событий, пока первая выполняется
+                deadline = time.monotonic() + 5
+                while shell.parse_cache_info().currsize < 3 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                parsed_during_first.append(shell.parse_cache_info().currsize)
+            return super().execute_pipeline(env, commands, stdin, measure, stdout, stderr)
+
+    shell = io_lib.IO(context_lib.Context(), SlowExecutor())
+    _, output = run_frontend(shell, read_fd)
+    os.close(read_fd)
+    assert parsed_during_first == [3]
+    assert output == "one\ntwo\nthree\n"
+    assert shell.parse_cache_info().hits == 3
+
+
+def test_interrupt_cancels_pipeline_and_keeps_shell():
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"sleep 30 | wc\n")
+    executor = executor_lib.Executor()
+    shell = io_lib.IO(context_lib.Context(), executor)
+
+    def interrupt():
+        deadline = time.monotonic() + 5
+        while not any(executor.running.values()) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        os.kill(os.getpid(), signal.SIGINT)
+        while any(executor.running.values()) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        os.write(write_fd, b"echo alive\n")
+        os.close(write_fd)
+
+    thread = threading.Thread(target=interrupt)
+    thread.start()
+    start = time.monotonic()
+    code, output = run_frontend(shell, read_fd)
+    thread.join()
+    os.close(read_fd)
+
+    assert time.monotonic() - start < 5
+    assert output == "0 0 0\nalive\n"
+    assert code == 0
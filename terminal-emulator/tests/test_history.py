@@ -0,0 +1,107 @@
+import io
+import os
+
+import pytest
+
+import src.builtins as builtins
+import src.history as history_lib
+
+
+@pytest.fixture()
+def path(tmp_path):
+    yield str(tmp_path / "history")
+
+
+def make_history(path: str, *commands: str) -> history_lib.History:
+    history = history_lib.History()
+    history.configure(path)
+    for command in commands:
+        history.add(command)
+    return history
+
+
+def test_persists_between_sessions(path):
+    make_history(path, "echo one", "wc file | wc").close()
+
+    history = make_history(path, "pwd")
+    assert history.entries() == [(1, "echo one"), (2, "wc file | wc"), (3, "pwd")]
+    assert history.entries(2) == [(3, "pwd")]
+    history.close()
+    with open(f"{path}.idx", "rb") as index:
+        assert len(index.read()) == 3 * history_lib.OFFSET_SIZE
+
+
+def test_writes_in_batches(path, monkeypatch):
+    monkeypatch.setattr(history_lib, "BATCH_SIZE", 3)
+    history = make_history(path, "a", "b")
+    # Файлы открываются только при первой записи или чтении
+    assert not os.path.exists(path)
+
+    history.add("c")
+    with open(path, "rb") as log:
+        assert log.read() == b"a\nb\nc\n"
+
+
+def test_search(path):
+    make_history(path, "echo red red", "cat red.txt | wc", "grep red", "wc").close()
+    history = make_history(path, "echo reds")
+
+    # Команда с несколькими совпадениями выводится один раз, несохранённые команды тоже ищутся
+    assert history.search("red") == [
+        (1, "echo red red"), (2, "cat red.txt | wc"), (3, "grep red"), (5, "echo reds")
+    ]
+    assert history.search("echo", prefix=True) == [(1, "echo red red"), (5, "echo reds")]
+    assert history.search("wc", prefix=True) == [(4, "wc")]
+    assert history.search("missing") == []
+
+
+def test_repairs_interrupted_write(path):
+    make_history(path, "echo one").close()
+    # Журнал дописан, а индекс нет; последняя команда оборвана на середине
+    with open(path, "ab") as log:
+        log.write(b"echo two\necho thr")
+
+    history = make_history(path)
+    assert history.entries() == [(1, "echo one"), (2, "echo two")]
+    history.add("echo three")
+    history.close()
+    assert make_history(path).entries()[-1] == (3, "echo three")
+
+
+def test_shared_between_shells(path):
+    first, second = make_history(path), make_history(path)
+    first.add("from first")
+    second.add("from second")
+    first.flush()
+    second.flush()
+    first.add("first again")
+    first.close()
+
+    assert second.entries() == [(1, "from first"), (2, "from second"), (3, "first again")]
+    second.close()
+
+
+def test_history_builtin(path, monkeypatch):
+    history = make_history(path, "echo one", "cat file", "echo two")
+    monkeypatch.setattr(history_lib, "history", history)
+
+    out_io = io.StringIO()
+    builtins.Builtin.history(None, out_io, "2")
+    assert out_io.getvalue() == "    2  cat file\n    3  echo two\n"
+
+    out_io = io.StringIO()
+    builtins.Builtin.history(None, out_io, p="echo")
+    assert out_io.getvalue() == "    1  echo one\n    3  echo two\n"
+
+    out_io = io.StringIO()
+    builtins.Builtin.history(None, out_io, s="file")
+    assert out_io.getvalue() == "    2  cat file\n"
+    history.close()
+
+
+def test_history_builtin_disabled(monkeypatch):
+    monkeypatch.setattr(history_lib, "history", history_lib.History())
+
+    out_io = io.StringIO()
+    assert builtins.Builtin.history(None, out_io).returncode == 1
+    assert out_io.getvalue() == "history: history is disabled\n"
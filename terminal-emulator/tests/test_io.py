@@ -1,4 +1,8 @@
+import pytest
+
+import src.context as context_lib
 import src.io as terminal_io
+import src.models as models
 
 
 def test_tokenize():
@@ -7,13 +11,20 @@ def test_tokenize():
     assert [
         r"'some'",
         r"'\"\\''",
-    ] == io.tokenize([io.single_quotes_pattern], r"echo 'some' --out='\"\\'' -n 10")
+    ] == [
+        token for token in io.tokenize(r"echo 'some' --out='\"\\'' -n 10")
+        if token.kind == models.TokenKind.QUOTED
+    ]
 
     assert [
         r'"some"',
         r'"\'\\""',
-    ] == io.tokenize([io.double_quotes_pattern], r'echo "some" --out="\'\\""" -n 10')
+    ] == [
+        token for token in io.tokenize(r'echo "some" --out="\'\\""" -n 10')
+        if token.kind == models.TokenKind.QUOTED
+    ]
 
+    tokens = io.tokenize(r"var=value echo 'single' \"double\" --out='\"\\'' --in=file -n 10 | wc")
     assert [
         r"var=value",
         r"echo",
@@ -27,7 +38,50 @@ def test_tokenize():
         r"10",
         r"|",
         r"wc",
-    ] == io.tokenize(io.pattern_pipeline, r"var=value echo 'single' \"double\" --out='\"\\'' --in=file -n 10 | wc")
+    ] == tokens
+    assert [
+        models.TokenKind.ASSIGNMENT,
+        models.TokenKind.WORD,
+        models.TokenKind.QUOTED,
+        models.TokenKind.WORD,
+        models.TokenKind.FLAG,
+        models.TokenKind.QUOTED,
+        models.TokenKind.FLAG,
+        models.TokenKind.WORD,
+        models.TokenKind.FLAG,
+        models.TokenKind.WORD,
+        models.TokenKind.PIPE,
+        models.TokenKind.WORD,
+    ] == [token.kind for token in tokens]
+
+
+def test_tokenize_short_quotes_and_pipes():
+    io = terminal_io.IO(None, None)  # noqa
+
+    assert ["echo", "'a'", "|", "wc", "|", "wc"] == io.tokenize("echo 'a'|wc | wc")
+
+
+def test_parse_redirections():
+    io = terminal_io.IO(None, None)  # noqa
+
+    assert ["cat", "<", "in.txt", "|", "wc", ">>", "out.txt"] == io.tokenize("cat <in.txt|wc >>out.txt")
+
+    parsed = io.parse_line("cat -n < in.txt | wc > out.txt x")
+    first, second = parsed.commands
+    assert (first.kwargs, first.args, first.stdin, first.stdout) == ({}, ["-n"], "in.txt", None)
+    assert (second.args, second.stdout, second.append) == (["x"], "out.txt", False)
+    assert io.parse_line("echo a >> log").commands[0].append
+
+
+def test_parse_long_command():
+    io = terminal_io.IO(None, None)  # noqa
+
+    tokens = io.tokenize("echo " + " ".join(["x"] * 50000) + " | wc")
+    command, position = io.consume_command_at(tokens, 0)
+
+    assert command.name == "echo"
+    assert len(command.args) == 50000
+    assert tokens[position] == "wc"
 
 
 def test_defenitions():
@@ -71,3 +125,47 @@ def test_consume_command():
         r"in": r"file",
         r"n": r"10",
     }
+
+
+class RecordingExecutor:
+    def __init__(self):
+        self.pipelines = []
+
+    def execute_pipeline(self, env, commands, stdin=None, measure=False, stdout=None, stderr=None):
+        self.pipelines.append([(command.name, command.args) for command in commands])
+        status = models.Status()
+        status.index, status.code = len(commands) - 1, 0
+        return status
+
+
+def test_parse_cache_expands_on_every_run():
+    executor = RecordingExecutor()
+    io = terminal_io.IO(context_lib.Context(), executor, parse_cache_size=8)
+
+    io.execute_command("x=1")
+    io.execute_command("echo ${x} | wc")
+    io.execute_command("x=2")
+    io.execute_command("echo ${x} | wc")
+
+    assert executor.pipelines == [
+        [("echo", ["1"]), ("wc", [])],
+        [("echo", ["2"]), ("wc", [])],
+    ]
+    info = io.parse_cache_info()
+    assert (info.hits, info.misses, info.maxsize) == (1, 3, 8)
+
+
+class FailingExecutor:
+    def execute_pipeline(self, env, commands, stdin=None, measure=False, stdout=None, stderr=None):
+        raise RuntimeError(env["x"])
+
+
+def test_scoped_definitions_removed_after_error():
+    context = context_lib.Context()
+    context.add_unscoped_param("x", "outer")
+    io = terminal_io.IO(context, FailingExecutor())
+
+    with pytest.raises(RuntimeError, match="inner"):
+        io.execute_command("x=inner echo")
+    assert context.get_value("x") == "outer"
+    assert len(context.layers) == 2
@@ -0,0 +1,87 @@
+import io
+import threading
+
+import pytest
+
+import src.builtins as builtins
+import src.exceptions as exceptions
+import src.io as terminal_io
+import src.jobs as jobs_lib
+
+
+@pytest.fixture()
+def controller(monkeypatch):
+    controller = jobs_lib.JobController()
+    monkeypatch.setattr(jobs_lib, "controller", controller)
+    yield controller
+
+
+def test_parse_background():
+    io_ = terminal_io.IO(None, None)  # noqa
+
+    parsed = io_.parse_line("sleep 1 | wc &")
+    assert parsed.background
+    assert [command.name for command in parsed.commands] == ["sleep", "wc"]
+
+    assert not io_.parse_line("echo a&b").background
+
+
+def test_job_registered_with_thread(controller, monkeypatch):
+    registered = []
+
+    class Thread(threading.Thread):
+        def start(self):
+            # Задача уже видна в таблице, и у неё есть поток, который можно ждать
+            registered.extend((job.job_id, job.thread) for job in controller.list())
+            super().start()
+
+    monkeypatch.setattr(jobs_lib.threading, "Thread", Thread)
+    job = controller.start("first", lambda: jobs_lib.JobController.make_status(0))
+
+    assert registered == [(1, job.thread)]
+    assert job.thread.name == "job-1"
+    assert job.wait().code == 0
+
+
+def test_jobs_run_concurrently(controller):
+    barrier = threading.Barrier(2, timeout=5)
+
+    def run():
+        barrier.wait()
+        return jobs_lib.JobController.make_status(0)
+
+    first = controller.start("first", run)
+    second = controller.start("second", run)
+
+    assert (first.job_id, second.job_id) == (1, 2)
+    assert first.wait().code == 0
+    assert second.wait().code == 0
+
+
+def test_exit_finishes_only_job(controller):
+    def run():
+        raise exceptions.ExitException()
+
+    assert controller.start("exit", run).wait().code == 0
+
+
+def test_wait_and_jobs_builtins(controller):
+    event = threading.Event()
+
+    def run():
+        event.wait(5)
+        return jobs_lib.JobController.make_status(3)
+
+    controller.start("sleep 100", run)
+
+    out_io = io.StringIO()
+    builtins.Builtin.jobs(None, out_io)
+    assert out_io.getvalue() == "[1] Running    sleep 100\n"
+
+    event.set()
+    assert builtins.Builtin.wait(None, out_io, "%1").returncode == 3
+    assert controller.list() == []
+
+    out_io = io.StringIO()
+    assert builtins.Builtin.fg(None, out_io).returncode == 1
+    assert out_io.getvalue() == "fg: no current job\n"
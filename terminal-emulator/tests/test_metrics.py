@@ -0,0 +1,73 @@
+import json
+import os
+
+import src.executor as executor_lib
+import src.io as terminal_io
+import src.metrics as metrics
+import src.models as models
+import src.spawn as spawn
+
+
+ENV = {"PATH": os.environ.get("PATH", os.defpath)}
+
+
+def test_pipeline_stage_metrics(capsys):
+    executor = executor_lib.Executor()
+    status = executor.execute_pipeline(
+        ENV, [models.make_command("echo", "a" * 1000), models.make_command("tr", "a", "b"), models.make_command("wc")], measure=True
+    )
+
+    assert capsys.readouterr().out == "1 1 1001\n"
+    assert [(stage.name, stage.builtin) for stage in status.stages] == [
+        ("echo", True), ("tr", False), ("wc", True)
+    ]
+    echo, tr, wc = status.stages
+    assert echo.bytes_out == 1001
+    assert tr.bytes_in >= 1001 and tr.bytes_out == 1001
+    assert wc.bytes_in == 1001
+    assert tr.max_rss > 0
+    assert status.wall_time >= max(stage.wall_time for stage in status.stages)
+
+
+def test_metrics_are_opt_in(capsys):
+    status = executor_lib.Executor().execute_pipeline(ENV, [models.make_command("echo", "a"), models.make_command("wc")])
+
+    assert status.stages == []
+    assert status.wall_time > 0
+
+
+def test_process_resources_collected_only_when_measured(monkeypatch):
+    read = []
+    monkeypatch.setattr(metrics, "process_io_counters", lambda pid: read.append(pid) or (0, 0))
+    spawner = spawn.SubprocessSpawner()
+    true_path = executor_lib.Executor().path_cache.resolve("true", ENV["PATH"])
+
+    # Без замера /proc/<pid>/io не читается и ресурсы процесса не запрашиваются
+    process = spawner.spawn(true_path, ["true"], ENV, None, 1, 2)
+    assert process.wait() == 0
+    assert (process.rusage, process.io_counters, read) == (None, (0, 0), [])
+
+    process = spawner.spawn(true_path, ["true"], ENV, None, 1, 2)
+    assert process.wait(measure=True) == 0
+    assert process.rusage is not None
+    assert read == [process.pid]
+
+
+def test_time_prefix_and_trace(tmp_path, capsys):
+    trace_path = tmp_path / "trace.jsonl"
+    trace = metrics.TraceSink(str(trace_path))
+    io = terminal_io.IO(terminal_io.context_lib.Context(), executor_lib.Executor(), trace=trace)
+
+    assert io.parse_line("time echo a").timed
+    assert not io.parse_line("time").timed
+    io.execute_command("time echo a | wc")
+    io.execute_command("echo b")
+    trace.close()
+
+    captured = capsys.readouterr()
+    assert captured.out == "1 1 2\nb\n"
+    assert captured.err.startswith("real ")
+    assert "[1] wc (builtin)" in captured.err
+    records = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    assert [record["command"] for record in records] == ["time echo a | wc", "echo b"]
+    assert [stage["name"] for stage in records[0]["stages"]] == ["echo", "wc"]
@@ -0,0 +1,74 @@
+import io
+import os
+
+import pytest
+
+import src.builtins as builtins
+import src.executor as executor_lib
+import src.models as models
+import src.path_cache as path_cache_lib
+
+
+@pytest.fixture()
+def bin_dir(tmp_path):
+    program = tmp_path / "tool"
+    program.write_text("#!/bin/sh\n")
+    program.chmod(0o755)
+    yield tmp_path
+
+
+def test_resolve_caches_path(bin_dir):
+    cache = path_cache_lib.PathCache()
+
+    assert cache.resolve("tool", str(bin_dir)) == str(bin_dir / "tool")
+    (bin_dir / "tool").unlink()
+    # Путь берётся из кеша без обхода PATH
+    assert cache.resolve("tool", str(bin_dir)) == str(bin_dir / "tool")
+    assert cache.hits[("tool", str(bin_dir))] == 2
+
+
+def test_entries_per_path(bin_dir, tmp_path_factory):
+    cache = path_cache_lib.PathCache()
+    cache.resolve("tool", str(bin_dir))
+
+    # Другой PATH, например у фоновой задачи, ищет заново и не сбрасывает чужую запись
+    other_dir = tmp_path_factory.mktemp("other")
+    assert cache.resolve("tool", str(other_dir)) is None
+    (bin_dir / "tool").unlink()
+    assert cache.resolve("tool", str(bin_dir)) == str(bin_dir / "tool")
+
+
+def test_missing_command_not_cached(bin_dir):
+    cache = path_cache_lib.PathCache()
+
+    assert cache.resolve("missing", str(bin_dir)) is None
+    assert ("missing", str(bin_dir)) not in cache.entries
+
+
+def test_hash_builtin(bin_dir, monkeypatch):
+    cache = path_cache_lib.PathCache()
+    monkeypatch.setattr(path_cache_lib, "path_cache", cache)
+    cache.resolve("tool", str(bin_dir))
+    cache.resolve("tool", os.defpath)
+    monkeypatch.setattr(builtins, "current_env", builtins.contextvars.ContextVar("env", default={"PATH": str(bin_dir)}))
+
+    # Выводятся только записи для PATH текущего контекста
+    out_io = io.StringIO()
+    builtins.Builtin.hash(None, out_io)
+    assert out_io.getvalue() == f"hits\tcommand\n   1\t{os.path.join(bin_dir, 'tool')}\n"
+
+    out_io = io.StringIO()
+    builtins.Builtin.hash(None, out_io, "-r")
+    builtins.Builtin.hash(None, out_io)
+    assert out_io.getvalue() == "hash: hash table empty\n"
+
+
+def test_hash_builtin_uses_command_path(bin_dir, monkeypatch, capsys):
+    cache = path_cache_lib.PathCache()
+    monkeypatch.setattr(path_cache_lib, "path_cache", cache)
+
+    # PATH берётся из окружения команды, а не из окружения процесса оболочки
+    status = executor_lib.Executor().execute_pipeline({"PATH": str(bin_dir)}, [models.make_command("hash", "tool")])
+    assert status.code == 0
+    assert cache.entries == {("tool", str(bin_dir)): str(bin_dir / "tool")}
+    assert capsys.readouterr().out == ""
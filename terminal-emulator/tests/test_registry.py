@@ -0,0 +1,78 @@
+import os
+import sys
+
+import src.builtins as builtins
+import src.executor as executor_lib
+import src.models as models
+import src.registry as registry_lib
+
+
+ENV = {"PATH": os.environ.get("PATH", os.defpath)}
+PLUGIN = '''
+import src.models as models
+
+
+def shout(in_io, out_io, *args, **kwargs):
+    out_io.write(" ".join(args).upper() + "\\n")
+    return models.ProcessResult(0)
+'''
+
+
+def test_builtins_registered():
+    registry = registry_lib.CommandRegistry.from_builtins()
+
+    assert registry.get("wc") is builtins.Builtin.wc
+    # Служебные атрибуты класса - не команды
+    assert registry.get("__init__") is None
+    assert registry.get("__class__") is None
+
+
+def test_plugin_dir_loaded_lazily(tmp_path):
+    (tmp_path / "shout.py").write_text(PLUGIN)
+    registry = registry_lib.CommandRegistry()
+    registry.load_plugin_dir(str(tmp_path))
+
+    assert "terminal_emulator_plugin_shout" not in sys.modules
+    assert registry.lazy == {"shout": f"{tmp_path / 'shout.py'}:shout"}
+    handler = registry.get("shout")
+    assert handler is not None and handler.__name__ == "shout"
+    assert registry.lazy == {}
+
+
+def test_module_target_loaded_lazily(tmp_path, monkeypatch):
+    (tmp_path / "shout_plugin.py").write_text(PLUGIN)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    registry = registry_lib.CommandRegistry()
+    registry.register_lazy("shout", "shout_plugin:shout")
+
+    assert "shout_plugin" not in sys.modules
+    try:
+        handler = registry.get("shout")
+        assert handler is sys.modules["shout_plugin"].shout
+    finally:
+        sys.modules.pop("shout_plugin", None)
+
+
+def test_executor_runs_plugin(tmp_path, capsys):
+    (tmp_path / "shout.py").write_text(PLUGIN)
+    registry = registry_lib.CommandRegistry.from_builtins()
+    registry.load_plugin_dir(str(tmp_path))
+    executor = executor_lib.Executor(registry=registry)
+
+    status = executor.execute_pipeline(ENV, [models.make_command("echo", "a"), models.make_command("shout", "hi", "there")])
+    assert (status.index, status.code) == (1, 0)
+    assert capsys.readouterr().out == "HI THERE\n"
+
+
+def test_executor_reports_broken_plugin(tmp_path, capsys):
+    (tmp_path / "broken.py").write_text("import terminal_emulator_missing_module\n")
+    registry = registry_lib.CommandRegistry.from_builtins()
+    registry.load_plugin_dir(str(tmp_path))
+    executor = executor_lib.Executor(registry=registry)
+
+    for commands in ([models.make_command("broken")], [models.make_command("echo", "a"), models.make_command("broken")]):
+        status = executor.execute_pipeline(ENV, commands)
+        assert (status.index, status.code) == (len(commands) - 1, 1)
+        assert capsys.readouterr().err == "broken: No module named 'terminal_emulator_missing_module'\n"
+    # Конвейер с ошибкой плагина не остаётся в числе выполняющихся
+    assert executor.cancelled == {} and executor.running == {}
@@ -0,0 +1,149 @@
+import io
+import os
+
+import pytest
+
+import src.builtins as builtins
+import src.result_cache as result_cache_lib
+
+
+@pytest.fixture()
+def cache(monkeypatch):
+    cache = result_cache_lib.ResultCache()
+    cache.configure()
+    monkeypatch.setattr(result_cache_lib, "result_cache", cache)
+    yield cache
+
+
+def wc(*args: str) -> str:
+    out_io = io.StringIO()
+    builtins.Builtin.wc(None, out_io, *args)
+    return out_io.getvalue()
+
+
+def append(path, text: str) -> None:
+    with open(path, "a") as f:
+        f.write(text)
+
+
+def test_unchanged_file_hits(cache, tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_text("roses are red\n")
+
+    assert wc(str(path)) == f"1 3 14 {path}\n"
+    assert wc(str(path)) == f"1 3 14 {path}\n"
+    assert cache.stats["miss"] == 1
+    assert cache.stats["hit"] == 1
+
+
+@pytest.mark.parametrize(
+    "old, tail",
+    [
+        ("roses are red\n", "violets are blue\n"),
+        ("word spl", "it in two\n"),  # Слово продолжается в дописанном хвосте
+        ("trailing ", " space"),
+        ("", "from empty"),
+    ]
+)
+def test_appended_file_counts_tail(cache, tmp_path, old, tail):
+    path = tmp_path / "input.txt"
+    path.write_text(old)
+    wc(str(path))
+    append(path, tail)
+
+    text = old + tail
+    assert wc(str(path)) == f"{text.count(chr(10))} {len(text.split())} {len(text.encode())} {path}\n"
+    assert cache.stats["append"] == 1
+
+
+def test_rewritten_file_recounted(cache, tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_text("one two\n")
+    wc(str(path))
+    # Файл стал длиннее, но его начало изменилось: досчитывать хвост нельзя
+    path.write_text("three four five\n")
+
+    assert wc(str(path)) == f"1 3 16 {path}\n"
+    assert cache.stats["append"] == 0
+    assert cache.stats["miss"] == 2
+
+
+def test_lru_eviction_within_budget(tmp_path, monkeypatch):
+    cache = result_cache_lib.ResultCache()
+    monkeypatch.setattr(result_cache_lib, "result_cache", cache)
+    paths = []
+    for i in range(3):
+        paths.append(tmp_path / f"file{i}.txt")
+        paths[-1].write_text("word\n")
+    cache.configure()
+    wc(str(paths[0]))
+    cache.memory_budget = cache.memory_used * 2
+
+    wc(str(paths[1]))
+    wc(str(paths[0]))  # file0 становится самой свежей записью
+    wc(str(paths[2]))
+
+    cached = {key[2] for key in cache.entries}
+    assert cached == {str(paths[0]), str(paths[2])}
+    assert cache.memory_used <= cache.memory_budget
+
+
+def test_persistence_across_sessions(tmp_path, monkeypatch):
+    path = tmp_path / "input.txt"
+    path.write_text("roses are red\n")
+    store = str(tmp_path / "cache.json")
+
+    first = result_cache_lib.ResultCache()
+    first.configure(persist_path=store)
+    monkeypatch.setattr(result_cache_lib, "result_cache", first)
+    wc(str(path))
+    first.save()
+
+    second = result_cache_lib.ResultCache()
+    second.configure(persist_path=store)
+    monkeypatch.setattr(result_cache_lib, "result_cache", second)
+    append(path, "violets are blue\n")
+    assert wc(str(path)) == f"2 6 31 {path}\n"
+    assert second.stats == {"hit": 0, "append": 1, "miss": 0, "uncached": 0}
+
+
+def test_corrupted_store_ignored(tmp_path):
+    store = tmp_path / "cache.json"
+    store.write_text("{not json")
+
+    cache = result_cache_lib.ResultCache()
+    cache.configure(persist_path=str(store))
+    assert not cache.entries
+
+
+def test_non_regular_file_not_cached(cache):
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"a b\n")
+    os.close(write_fd)
+    try:
+        assert wc(f"/dev/fd/{read_fd}") == f"1 2 4 /dev/fd/{read_fd}\n"
+    finally:
+        os.close(read_fd)
+    assert not cache.entries
+
+
+def test_cache_builtin(cache, tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_text("a\n")
+    wc(str(path), str(path))
+
+    out_io = io.StringIO()
+    builtins.Builtin.cache(None, out_io)
+    assert out_io.getvalue().splitlines()[:4] == ["hit\t0", "append\t0", "miss\t2", "uncached\t0"]
+    assert out_io.getvalue().splitlines()[4] == "entries\t1"
+
+    builtins.Builtin.cache(None, out_io, "-r")
+    assert not cache.entries and cache.stats["miss"] == 0
+
+
+def test_cache_builtin_disabled(monkeypatch):
+    monkeypatch.setattr(result_cache_lib, "result_cache", result_cache_lib.ResultCache())
+
+    out_io = io.StringIO()
+    assert builtins.Builtin.cache(None, out_io).returncode == 1
+    assert out_io.getvalue() == "cache: result cache is disabled\n"
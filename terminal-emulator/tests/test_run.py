@@ -1,3 +1,4 @@
+import os
 import subprocess
 
 
@@ -8,4 +9,30 @@ def test_exceptions():
         'exit\n'
     ).encode()
     result = subprocess.run(["python", "src/main.py"], input=input, capture_output=True)
-    assert result.stdout.decode().strip().split() == "[ terminal ]: 1 1 18\n[ terminal ]: Quitting...".strip().split()
\ No newline at end of file
+    # stdin не терминал, поэтому команды выполняются как скрипт, без приглашения
+    assert result.stdout.decode().strip().split() == "1 1 18\nQuitting...".strip().split()
+
+
+def test_script_file(tmp_path):
+    script = tmp_path / "script.sh"
+    script.write_text(
+        '#!/usr/bin/env terminal\n'
+        'x=example.txt\n'
+        '\n'
+        'wc tests/${x}\n'
+        'echo "${x}" \\\n'
+        '| wc\n'
+        'false\n'
+    )
+    result = subprocess.run(["python", "src/main.py", str(script)], capture_output=True)
+    assert result.stdout.decode() == "0 6 30 tests/example.txt\n1 1 12\n"
+    assert result.returncode == 1
+
+
+def test_startup_does_not_load_heavy_modules():
+    code = (
+        "import sys, src.main; "
+        "print(*[m for m in ('subprocess', 'multiprocessing', 'concurrent.futures', 'json', 'shutil') if m in sys.modules])"
+    )
+    result = subprocess.run(["python", "-c", code], capture_output=True, env={**os.environ, "PYTHONPATH": "."})
+    assert result.stdout.decode().strip() == ""
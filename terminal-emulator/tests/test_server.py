@@ -0,0 +1,65 @@
+import io
+import os
+import sys
+import threading
+
+import pytest
+
+import src.executor as executor_lib
+import src.server as server_lib
+
+
+@pytest.fixture()
+def socket_path(tmp_path):
+    path = str(tmp_path / "shell.sock")
+    server = server_lib.ShellServer(path, executor_lib.Executor())
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_sessions_have_own_variables(socket_path):
+    with server_lib.Client(socket_path) as first, server_lib.Client(socket_path) as second:
+        assert first.execute("x=first").code == 0
+        assert second.execute("x=second").code == 0
+
+        response = first.execute("echo ${x} | wc")
+        assert (response.code, response.index, response.stdout) == (0, 1, "1 1 6\n")
+        assert second.execute("echo ${x}").stdout == "second\n"
+
+
+def test_output_and_errors_are_captured(socket_path):
+    with server_lib.Client(socket_path) as client:
+        response = client.execute("echo hello | tr a-z A-Z")
+        assert (response.code, response.stdout, response.stderr) == (0, "HELLO\n", "")
+
+        response = client.execute("no-such-command")
+        assert (response.code, response.index) == (-1, 0)
+        assert "not found" in response.stderr
+
+        response = client.execute("sleep 1 &")
+        assert response.code == 2
+
+
+def test_exit_closes_session(socket_path):
+    with server_lib.Client(socket_path) as client:
+        assert client.execute("exit").code == 0
+        with pytest.raises(ConnectionError):
+            client.execute("pwd")
+
+    with server_lib.Client(socket_path) as client:
+        assert client.execute("pwd").stdout == os.getcwd() + "\n"
+
+
+def test_builtin_does_not_read_server_stdin(socket_path, monkeypatch):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("data piped to the server\n"))
+
+    with server_lib.Client(socket_path) as client:
+        response = client.execute("wc")
+        assert (response.code, response.stdout) == (0, "0 0 0\n")
+        # cat дописывает в конец перевод строки, данные stdin сервера в вывод не попадают
+        assert client.execute("cat | wc").stdout == "1 0 1\n"
+    assert sys.stdin.read() == "data piped to the server\n"
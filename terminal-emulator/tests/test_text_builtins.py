@@ -0,0 +1,120 @@
+import io
+import shutil
+import subprocess
+
+import pytest
+
+import src.exceptions as exceptions
+import src.text_builtins as text_builtins
+
+
+TEXT = "banana\napple\nCherry\napple\napple\n10 items\n9 items\nbanana\n"
+Builtin = text_builtins.TextBuiltin
+
+
+def run(command, *args, text=TEXT, **kwargs):
+    out_io = io.StringIO()
+    result = getattr(Builtin, command)(io.StringIO(text), out_io, *args, **kwargs)
+    return result.returncode, out_io.getvalue()
+
+
+@pytest.mark.parametrize(
+    "argv, args, kwargs",
+    [
+        (["grep", "an"], ["an"], {}),
+        (["grep", "-i", "cherry"], [], {"i": "cherry"}),
+        (["grep", "-v", "-c", "apple"], ["-v"], {"c": "apple"}),
+        (["grep", "-n", "items"], [], {"n": "items"}),
+        (["head", "-n", "3"], [], {"n": "3"}),
+        (["head", "-2"], ["-2"], {}),
+        (["tail", "-n", "2"], [], {"n": "2"}),
+        (["tail", "-n", "+7"], [], {"n": "+7"}),
+        (["sort"], [], {}),
+        (["sort", "-r", "-u"], ["-r", "-u"], {}),
+        (["sort", "-n", "-u"], ["-n", "-u"], {}),
+        (["uniq", "-c"], ["-c"], {}),
+    ],
+)
+def test_matches_external_tool(argv, args, kwargs):
+    if shutil.which(argv[0]) is None:
+        pytest.skip(f"{argv[0]} is not installed")
+    expected = subprocess.run(argv, input=TEXT, capture_output=True, text=True, env={"LC_ALL": "C"})
+
+    assert run(argv[0], *args, **kwargs) == (expected.returncode, expected.stdout)
+
+
+def test_grep_files_and_exit_codes(tmp_path):
+    first, second = tmp_path / "a.txt", tmp_path / "b.txt"
+    first.write_text("error: disk\nok\n")
+    second.write_text("ok\nerror: net")
+
+    assert run("grep", "error", str(first), str(second)) == (0, f"{first}:error: disk\n{second}:error: net\n")
+    assert run("grep", "missing") == (1, "")
+    with pytest.raises(exceptions.UsageError):
+        run("grep", "-x", "a")
+
+
+def test_sort_numeric():
+    assert run("sort", "-n", text="10\n9\n-1\nx\n") == (0, "-1\nx\n9\n10\n")
+
+
+def test_sort_numeric_unique():
+    # Строки с равными числами - дубликаты, выводится первая из них
+    assert run("sort", "-n", "-u", text="10\n9\n010\n9\n") == (0, "9\n10\n")
+
+
+def test_sort_external_merge(monkeypatch):
+    monkeypatch.setattr(text_builtins, "SORT_MEMORY_LIMIT", 8)
+    lines = [f"{i * 7919 % 1000:03}\n" for i in range(1000)]
+
+    assert run("sort", text="".join(lines)) == (0, "".join(sorted(lines)))
+    assert run("sort", "-r", text="".join(lines)) == (0, "".join(sorted(lines, reverse=True)))
+
+
+def test_head_stops_reading():
+    in_io = io.StringIO("".join(f"{i}\n" for i in range(10000)))
+    out_io = io.StringIO()
+    Builtin.head(in_io, out_io, n="2")
+
+    assert out_io.getvalue() == "0\n1\n"
+    assert in_io.tell() < 100
+
+
+@pytest.mark.parametrize("block_size", [text_builtins.BLOCK_SIZE, 16])
+@pytest.mark.parametrize(
+    "args",
+    [["^$"], ["-v", "^$"], ["-n", "^$"], ["^"], ["$"], [""], ["-c", ""], [".*"], ["x*"], ["-v", "x*"]],
+)
+def test_grep_empty_matches(monkeypatch, block_size, args):
+    if shutil.which("grep") is None:
+        pytest.skip("grep is not installed")
+    monkeypatch.setattr(text_builtins, "BLOCK_SIZE", block_size)
+    text = "".join("\n" if i % 3 == 0 else f"line {i}\n" for i in range(100))
+    expected = subprocess.run(["grep", *args], input=text, capture_output=True, text=True, env={"LC_ALL": "C"})
+
+    assert run("grep", *args, text=text) == (expected.returncode, expected.stdout)
+
+
+@pytest.mark.parametrize(
+    "args, matches",
+    [
+        (["red"], lambda line: "red" in line),
+        (["-v", "red"], lambda line: "red" not in line),
+        (["-n", "red"], lambda line: "red" in line),
+        (["-c", "red"], lambda line: "red" in line),
+        (["d$"], lambda line: line.endswith("d")),
+    ],
+)
+def test_grep_blocks(monkeypatch, args, matches):
+    # Блоки по несколько строк, плотные и редкие совпадения чередуются
+    monkeypatch.setattr(text_builtins, "BLOCK_SIZE", 16)
+    lines = ["red" if i % 50 < 25 else f"blue {i}" for i in range(200)] + ["last red"]
+    selected = [(number, line) for number, line in enumerate(lines, 1) if matches(line)]
+    if args[0] == "-n":
+        expected = "".join(f"{number}:{line}\n" for number, line in selected)
+    elif args[0] == "-c":
+        expected = f"{len(selected)}\n"
+    else:
+        expected = "".join(f"{line}\n" for _, line in selected)
+
+    assert run("grep", *args, text="\n".join(lines)) == (0, expected)